@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from data_processor import amount_paise, DAY_ORDER
+
+# Optional grouping levels, used when the frame has been categorized
+OPTIONAL_LEVELS = ['category', 'merchant_cluster']
+
+# How each partial statistic combines across days, files or ledger appends
+PARTIAL_STATS = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max', 'sumsq': 'sum'}
+
+
+def daily_partials(df):
+    """Mergeable paise sum, count, min, max and sum of squares per (type, category, day)"""
+    # Rows without a parseable amount don't count, as with a pandas sum
+    paise = amount_paise(df)
+    if paise.isna().any():
+        df = df[paise.notna().to_numpy()]
+        paise = paise.dropna()
+    paise = paise.astype('int64')
+
+    levels = {'type': df['type']}
+    for level in OPTIONAL_LEVELS:
+        if level in df.columns:
+            levels[level] = df[level]
+    levels['day'] = df['date'].dt.normalize()
+
+    # Read-only: group keys are passed as series, nothing is assigned to df
+    values = pd.DataFrame({'paise': paise, 'square': paise.astype('float64') ** 2})
+    grouped = values.groupby(list(levels.values()), observed=True, dropna=False)
+    partials = grouped['paise'].agg(['sum', 'count', 'min', 'max'])
+    # Squares overflow int64 above ~₹3 crore per day, so they are kept as float
+    partials['sumsq'] = grouped['square'].sum()
+    partials.index.names = list(levels)
+    return partials
+
+
+def merge_partials(*partials):
+    """Combine partial frames that share the same levels"""
+    frames = [frame for frame in partials if frame is not None]
+    if len(frames) == 1:
+        return frames[0]
+    combined = pd.concat(frames)
+    return combined.groupby(level=list(combined.index.names), observed=True, dropna=False).agg(PARTIAL_STATS)
+
+
+def filter_partials(partials, start=None, end=None, types=None, categories=None):
+    """Select days in [start, end] and the given types/categories without touching rows"""
+    mask = np.ones(len(partials), dtype=bool)
+    days = partials.index.get_level_values('day')
+    if start is not None:
+        mask &= days >= pd.Timestamp(start)
+    if end is not None:
+        mask &= days <= pd.Timestamp(end)
+    if types is not None:
+        mask &= partials.index.get_level_values('type').isin(types)
+    if categories is not None and 'category' in partials.index.names:
+        mask &= partials.index.get_level_values('category').isin(categories)
+    return partials[mask]
+
+
+class TransactionAggregate:
+    """Cube of daily partials, rolled up by (type, category, month) for insights and by period for charts"""
+
+    def __init__(self, df=None, partials=None):
+        # Built from rows, or from precomputed daily partials without rescanning rows
+        if partials is None:
+            partials = daily_partials(df)
+        self.partials = partials
+
+        keys = [partials.index.get_level_values(level) for level in partials.index.names if level != 'day']
+        keys.append(partials.index.get_level_values('day').to_period('M'))
+        self.levels = [level for level in partials.index.names if level != 'day'] + ['month']
+        self.groups = partials.groupby(keys, observed=True, dropna=False).agg(PARTIAL_STATS)
+        self.groups.index.names = self.levels
+
+    def _select_partials(self, transaction_type):
+        if transaction_type is None:
+            return self.partials
+        if transaction_type not in self.partials.index.get_level_values('type'):
+            return self.partials.iloc[:0]
+        return self.partials.xs(transaction_type, level='type', drop_level=False)
+
+    def _select(self, transaction_type):
+        if transaction_type is None:
+            return self.groups
+        if transaction_type not in self.groups.index.get_level_values('type'):
+            return self.groups.iloc[:0]
+        return self.groups.xs(transaction_type, level='type', drop_level=False)
+
+    def total(self, transaction_type=None):
+        """Sum in paise, optionally for one transaction type"""
+        return int(self._select(transaction_type)['sum'].sum())
+
+    def count(self, transaction_type=None):
+        return int(self._select(transaction_type)['count'].sum())
+
+    def largest(self):
+        return int(self.groups['max'].max()) if len(self.groups) else 0
+
+    def smallest(self):
+        return int(self.groups['min'].min()) if len(self.groups) else 0
+
+    def std(self, transaction_type=None):
+        """Population standard deviation of amounts in paise"""
+        selected = self._select(transaction_type)
+        count = selected['count'].sum()
+        if not count:
+            return 0.0
+        mean = selected['sum'].sum() / count
+        return float(np.sqrt(max(selected['sumsq'].sum() / count - mean ** 2, 0.0)))
+
+    def breakdown(self, level, transaction_type='Debit'):
+        """Paise per value of one level (category, merchant_cluster, month), largest first"""
+        if level not in self.levels:
+            return pd.Series(dtype='int64')
+        selected = self._select(transaction_type)['sum']
+        return selected.groupby(level=level, dropna=True).sum().sort_values(ascending=False, kind='stable')
+
+    def monthly(self, transaction_type='Debit'):
+        """Paise per calendar month in date order"""
+        return self.breakdown('month', transaction_type).sort_index()
+
+    def timeline(self, freq='D', transaction_type=None):
+        """Rupee totals per day ('D'), week ('W') or month ('M') in date order"""
+        partials = self._select_partials(transaction_type)
+        days = partials.index.get_level_values('day')
+        keys = days if freq == 'D' else days.to_period(freq)
+        return partials['sum'].groupby(keys).sum().sort_index() / 100
+
+    def totals(self, level, transaction_type=None):
+        """Rupee totals per type or category, largest first"""
+        return self.breakdown(level, transaction_type) / 100
+
+    def day_of_week(self, transaction_type=None):
+        """Rupee totals per weekday, Monday first"""
+        partials = self._select_partials(transaction_type)
+        weekdays = partials.index.get_level_values('day').day_name()
+        return (partials['sum'].groupby(weekdays).sum() / 100).reindex(DAY_ORDER).dropna()
+
+    def month_of_year(self, transaction_type=None):
+        """Rupee totals per calendar month number (1-12), across years"""
+        partials = self._select_partials(transaction_type)
+        months = partials.index.get_level_values('day').month
+        return partials['sum'].groupby(months).sum().sort_index() / 100
@@ -1,52 +1,264 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
 import re
+import hashlib
+import json
 from datetime import datetime, timedelta
+from data_processor import amount_paise, factorize_merchants, DESCRIPTION_STOPWORDS
+from aggregates import TransactionAggregate
+from storage import MerchantCategoryCache
+from config import Config
 
-class FinanceAIAgent:
-    def __init__(self):
-        self.categories = {
-            'Food & Dining': ['restaurant', 'food', 'meal', 'dining', 'cafe', 'pizza', 'burger', 'swiggy', 'zomato'],
-            'Transportation': ['uber', 'ola', 'metro', 'bus', 'fuel', 'petrol', 'diesel', 'parking', 'toll'],
-            'Shopping': ['amazon', 'flipkart', 'myntra', 'shop', 'store', 'mall', 'clothing', 'electronics'],
-            'Entertainment': ['movie', 'netflix', 'prime', 'hotstar', 'game', 'concert', 'theatre'],
-            'Healthcare': ['medical', 'pharmacy', 'doctor', 'hospital', 'medicine', 'health'],
-            'Utilities': ['electricity', 'water', 'gas', 'internet', 'mobile', 'recharge'],
-            'Education': ['course', 'book', 'tuition', 'college', 'university', 'education'],
-            'Investment': ['mutual', 'fund', 'stock', 'investment', 'sip', 'equity'],
-            'Travel': ['hotel', 'flight', 'booking', 'travel', 'vacation', 'trip'],
-            'Personal Care': ['salon', 'spa', 'beauty', 'gym', 'fitness', 'wellness']
+def _trie_regex(words):
+    """Alternation shaped like a trie so shared prefixes are tested once; longest match wins"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Compiled multi-keyword matcher where the first category with any matching keyword wins"""
+
+    def __init__(self, categories, default='Other'):
+        self.names = list(categories) + [default]
+        ranks = {}
+        for rank, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                ranks.setdefault(keyword.lower(), rank)
+
+        # Only the longest keyword at a position is reported, and all its prefixes matched there too
+        self.priority = {
+            keyword: min(rank for other, rank in ranks.items() if keyword.startswith(other))
+            for keyword in ranks
         }
+        self.pattern = re.compile(f"(?=({_trie_regex(ranks)}))")
+        self.digit_free = not any(char.isdigit() for keyword in ranks for char in keyword)
+        # Identifies the keyword set so persisted categorizations can be invalidated
+        self.version = hashlib.sha256(json.dumps([self.names, list(ranks.items())]).encode()).hexdigest()[:16]
+
+    def match(self, text):
+        """Index into names of the category for one description"""
+        found = self.pattern.findall(text.lower())
+        if not found:
+            return len(self.names) - 1
+        return min(self.priority[keyword] for keyword in found)
+
+    def categorize(self, descriptions):
+        """Categorize a description column, scanning each distinct description once"""
+        # Digit runs can never be part of a match, so collapsing reference numbers and dates is safe
+        if self.digit_free:
+            descriptions = descriptions.str.replace(r"\d+", '0', regex=True)
+        codes, uniques = pd.factorize(descriptions)
+        ranks = np.fromiter((self.match(str(text)) for text in uniques), dtype=np.int64, count=len(uniques))
+        # Missing descriptions (code -1) fall through to the default
+        ranks = np.append(ranks, len(self.names) - 1)
+        return pd.Series(np.array(self.names, dtype=object)[ranks[codes]], index=descriptions.index)
+
+
+class FinanceAIAgent:
+    def __init__(self, merchant_cache_path=None):
+        self.categories = Config.AI_CATEGORIES
+        self.matcher = KeywordMatcher(self.categories)
+        self.merchant_cache = MerchantCategoryCache(merchant_cache_path, version=self.matcher.version)
     
     def categorize_transactions(self, df):
-        def get_category(description):
-            description_lower = description.lower()
-            for category, keywords in self.categories.items():
-                if any(keyword in description_lower for keyword in keywords):
-                    return category
-            return 'Other'
+        # Categorize each distinct merchant once; repeats come from the LRU
+        codes, keys = factorize_merchants(df['description'])
+        categories = self.merchant_cache.get_many(keys)
+        missing = [position for position, category in enumerate(categories) if category is None]
+        if missing:
+            found = self.matcher.categorize(pd.Series(keys[missing], dtype=object)).tolist()
+            for position, category in zip(missing, found):
+                categories[position] = category
+            self.merchant_cache.put_many(zip(keys[missing], found))
+            self.merchant_cache.save()
+        
+        # Missing descriptions (code -1) get the default category
+        categories = np.array(categories + [self.matcher.names[-1]], dtype=object)
+        df['category'] = categories[codes]
+        return df
+    
+    def cluster_uncategorized(self, df, n_clusters=None, batch_size=None):
+        """Group 'Other' transactions into merchant clusters labelled by their top terms"""
+        n_clusters = n_clusters or Config.OTHER_CLUSTERS
+        batch_size = batch_size or Config.OTHER_CLUSTER_BATCH_SIZE
+        df['merchant_cluster'] = None
+        other = (df['category'] == self.matcher.names[-1]).to_numpy()
+        if not other.any():
+            return df
+        
+        # Only distinct merchant keys are vectorized and clustered
+        codes, keys = factorize_merchants(df.loc[other, 'description'])
+        if not len(keys):
+            return df
+        weights = np.bincount(codes[codes >= 0], minlength=len(keys))
+        n_clusters = min(n_clusters, len(keys))
+        if n_clusters < 2:
+            labels = np.zeros(len(keys), dtype=np.int64)
+        else:
+            # Hashed features need no fitted vocabulary, so batches can be streamed
+            vectorizer = HashingVectorizer(
+                n_features=2 ** 18, alternate_sign=False, stop_words=list(DESCRIPTION_STOPWORDS),
+                token_pattern=r"(?u)\b[a-z&]{3,}\b"
+            )
+            features = vectorizer.transform(keys)
+            model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3)
+            step = max(batch_size, n_clusters)
+            for start in range(0, len(keys), step):
+                model.partial_fit(features[start:start + step])
+            labels = model.predict(features)
         
-        df['category'] = df['description'].apply(get_category)
+        # Label each cluster with its most frequent terms, weighted by transaction count
+        terms = pd.DataFrame({'cluster': labels, 'term': pd.Series(keys, dtype=object).str.split(), 'weight': weights})
+        terms = terms.explode('term').dropna()
+        terms = terms[~terms['term'].isin(DESCRIPTION_STOPWORDS) & (terms['term'].str.len() > 2)]
+        top_terms = (
+            terms.groupby(['cluster', 'term'])['weight'].sum()
+            .sort_values(ascending=False, kind='stable')
+            .groupby(level='cluster').head(Config.OTHER_CLUSTER_LABEL_TERMS)
+            .reset_index()
+            .groupby('cluster')['term'].agg(', '.join)
+        )
+        names = np.array(
+            [top_terms.get(cluster, self.matcher.names[-1]) for cluster in range(labels.max() + 1)] + [None],
+            dtype=object
+        )
+        # Missing descriptions (code -1) stay unclustered
+        cluster_of_key = np.append(labels, -1)
+        df.loc[other, 'merchant_cluster'] = names[cluster_of_key[codes]]
         return df
     
-    def analyze_spending_patterns(self, df):
+    def detect_recurring_payments(self, df):
+        """Debits repeating weekly, monthly or yearly at a near-equal amount, with the next expected charge"""
+        columns = ['merchant', 'category', 'amount', 'period', 'monthly_cost', 'occurrences', 'regularity', 'last_date', 'next_expected']
+        debits = df[(df['type'] == 'Debit').to_numpy()]
+        codes, keys = factorize_merchants(debits['description'])
+        frame = pd.DataFrame({
+            'merchant': codes,
+            'paise': amount_paise(debits).to_numpy(dtype='int64'),
+            'date': debits['date'].to_numpy()
+        })
+        frame = frame[(frame['merchant'] >= 0) & (frame['paise'] > 0)]
+        if frame.empty:
+            return pd.DataFrame(columns=columns)
+        
+        # Near-equal amounts: within a merchant, a new series starts where the sorted amount jumps
+        tolerance = Config.RECURRING_AMOUNT_TOLERANCE
+        frame = frame.sort_values(['merchant', 'paise'], kind='stable')
+        jump = (frame['merchant'].diff() != 0) | (frame['paise'] > frame['paise'].shift() * (1 + tolerance))
+        frame['series'] = jump.cumsum()
+        
+        # Inter-arrival gaps in days within each series
+        frame = frame.sort_values(['series', 'date'], kind='stable')
+        frame['gap'] = (frame['date'].diff().dt.total_seconds() / 86400).where(frame['series'].diff() == 0)
+        
+        # Pass 1: the median gap decides each series' period
+        names = list(Config.RECURRING_PERIODS)
+        period_days = np.array([days for days, _ in Config.RECURRING_PERIODS.values()])
+        period_slack = np.array([slack for _, slack in Config.RECURRING_PERIODS.values()])
+        median_gap = frame.groupby('series')['gap'].median()
+        distance = np.abs(median_gap.to_numpy()[:, None] - period_days[None, :])
+        fits = distance <= period_slack
+        period = pd.Series(np.where(fits.any(axis=1), fits.argmax(axis=1), -1), index=median_gap.index)
+        
+        # Pass 2: how many gaps fit that period, and each series' summary
+        row_period = frame['series'].map(period).to_numpy()
+        known = row_period >= 0
+        frame['regular'] = known & (
+            np.abs(frame['gap'].to_numpy() - period_days[row_period]) <= period_slack[row_period]
+        )
+        stats = frame.groupby('series').agg(
+            merchant=('merchant', 'first'), occurrences=('gap', 'size'), gaps=('gap', 'count'),
+            regular=('regular', 'sum'), paise=('paise', 'median'), last_date=('date', 'max')
+        )
+        stats['period'] = period
+        stats['regularity'] = stats['regular'] / stats['gaps'].clip(lower=1)
+        stats = stats[
+            (stats['period'] >= 0)
+            & (stats['occurrences'] >= Config.RECURRING_MIN_OCCURRENCES)
+            & (stats['regularity'] >= Config.RECURRING_MIN_REGULARITY)
+        ]
+        if stats.empty:
+            return pd.DataFrame(columns=columns)
+        
+        # Project the next charge one period after the last, on calendar months/years where they apply
+        monthly_cost = stats['paise'] / 100 * Config.RECURRING_PERIODS['monthly'][0] / period_days[stats['period'].to_numpy()]
+        stats['period'] = np.array(names, dtype=object)[stats['period'].to_numpy()]
+        next_expected = stats['last_date'] + pd.to_timedelta(7, unit='D')
+        next_expected = next_expected.where(stats['period'] != 'monthly', stats['last_date'] + pd.DateOffset(months=1))
+        next_expected = next_expected.where(stats['period'] != 'yearly', stats['last_date'] + pd.DateOffset(years=1))
+        
+        merchant_keys = pd.Series(keys[stats['merchant'].to_numpy()], dtype=object)
+        recurring = pd.DataFrame({
+            'merchant': [self._merchant_label(key) for key in merchant_keys],
+            'category': self.matcher.categorize(merchant_keys).to_numpy(),
+            'amount': stats['paise'].to_numpy() / 100,
+            'period': stats['period'].to_numpy(),
+            'monthly_cost': monthly_cost.round(2).to_numpy(),
+            'occurrences': stats['occurrences'].to_numpy(),
+            'regularity': stats['regularity'].round(2).to_numpy(),
+            'last_date': stats['last_date'].to_numpy(),
+            'next_expected': next_expected.to_numpy()
+        })
+        return recurring.sort_values('next_expected', kind='stable').reset_index(drop=True)
+    
+    def _merchant_label(self, key):
+        words = [word for word in key.split() if len(word) > 2 and word not in DESCRIPTION_STOPWORDS]
+        return ' '.join(words).title() or key.title()
+    
+    def analyze_spending_patterns(self, df, aggregate=None):
         insights = {}
-        insights['total_transactions'] = len(df)
-        insights['total_spent'] = df[df['type'] == 'Debit']['amount'].sum()
-        insights['total_received'] = df[df['type'] == 'Credit']['amount'].sum()
+        # Every insight reads the same grouped paise sums; rupees only in the result
+        aggregate = aggregate or TransactionAggregate(df)
+        insights['total_transactions'] = aggregate.count()
+        insights['total_spent'] = aggregate.total('Debit') / 100
+        insights['total_received'] = aggregate.total('Credit') / 100
         insights['net_flow'] = insights['total_received'] - insights['total_spent']
         
-        if 'category' in df.columns:
-            category_spending = df[df['type'] == 'Debit'].groupby('category')['amount'].sum().sort_values(ascending=False)
-            insights['top_categories'] = category_spending.head(5).to_dict()
+        if 'category' in aggregate.levels:
+            insights['top_categories'] = (aggregate.breakdown('category').head(5) / 100).to_dict()
         
-        df['month'] = df['date'].dt.to_period('M')
-        monthly_spending = df[df['type'] == 'Debit'].groupby('month')['amount'].sum()
-        insights['avg_monthly_spending'] = monthly_spending.mean()
+        if 'merchant_cluster' in aggregate.levels:
+            insights['other_clusters'] = (aggregate.breakdown('merchant_cluster').head(5) / 100).to_dict()
+        
+        monthly = aggregate.monthly()
+        insights['avg_monthly_spending'] = float(monthly.mean()) / 100 if len(monthly) else 0.0
         
         return insights
     
+    def anomaly_notifications(self, df, scores):
+        """anomaly_detection notifications for the flagged transactions in df"""
+        if not Config.ENABLE_NOTIFICATIONS or 'anomaly_detection' not in Config.NOTIFICATION_TYPES:
+            return []
+        flagged = scores.reindex(df.index)
+        flagged = flagged[flagged['is_anomaly'].fillna(False).astype(bool)]
+        if flagged.empty:
+            return []
+        
+        most_unusual = df.loc[flagged['anomaly_score'].idxmax()]
+        description = str(most_unusual['description'])[:60]
+        return [{
+            'type': 'warning',
+            'notification': 'anomaly_detection',
+            'title': 'Unusual Transactions',
+            'message': f"{len(flagged)} of your transactions look unusually large for their merchant or category. "
+                       f"The most unusual is ₹{most_unusual['amount']:,.2f} on {most_unusual['date']:%d %b %Y} ({description})."
+        }]
+    
     def generate_recommendations(self, insights):
         recommendations = []
 
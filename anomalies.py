@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from config import Config
+from data_processor import amount_paise, factorize_merchants
+
+# Scales MAD to the standard deviation of a normal distribution (modified z-score)
+MAD_SCALE = 0.6745
+
+# Groupings scored independently; the merchant baseline is preferred once it has enough history
+ANOMALY_GROUPS = {
+    'category': ['type', 'category'],
+    'merchant': ['type', 'merchant']
+}
+
+
+class AnomalyDetector:
+    """Robust trailing median/MAD scores of log amounts per (type, category) and (type, merchant)"""
+
+    def __init__(self, window=None, min_history=None, threshold=None, min_mad=None):
+        self.window = window or Config.ANOMALY_WINDOW
+        self.min_history = min_history or Config.ANOMALY_MIN_HISTORY
+        self.threshold = threshold or Config.ANOMALY_THRESHOLD
+        self.min_mad = Config.ANOMALY_MIN_MAD if min_mad is None else min_mad
+        # Last `window` rows of every group, with their deviations, to continue scoring from
+        self.history = None
+
+    def _frame(self, df):
+        codes, keys = factorize_merchants(df['description'])
+        merchants = np.append(keys, None)[codes]
+        frame = pd.DataFrame({
+            'date': df['date'].to_numpy(),
+            # Spending varies multiplicatively, so deviations are measured on log amounts
+            'log_amount': np.log1p(amount_paise(df).to_numpy(dtype='float64').clip(min=0)),
+            'type': df['type'].astype(object).to_numpy(),
+            'category': df['category'].astype(object).to_numpy() if 'category' in df.columns else None,
+            'merchant': merchants
+        }, index=df.index)
+        return frame
+
+    def _score_group(self, combined, keys, name):
+        """Score new rows against the trailing window of their group"""
+        present = combined[keys].notna().all(axis=1).to_numpy()
+        scores = pd.Series(np.nan, index=combined.index)
+        deviations = combined[f'dev_{name}'].copy()
+        if not present.any():
+            return scores, deviations
+        frame = combined[present]
+        groups = [frame[key] for key in keys]
+
+        # Only values before a row count towards its baseline, so an outlier can't mask itself
+        def trailing_median(values):
+            prior = values.groupby(groups, sort=False).shift(1)
+            return prior.groupby(groups, sort=False).rolling(self.window, min_periods=self.min_history).median().droplevel(
+                list(range(len(keys)))
+            ).reindex(values.index)
+
+        median = trailing_median(frame['log_amount'])
+        new = frame['new'].to_numpy()
+        deviation = frame[f'dev_{name}'].where(~new, (frame['log_amount'] - median).abs())
+        mad = trailing_median(deviation)
+        score = MAD_SCALE * (frame['log_amount'] - median) / np.maximum(mad, self.min_mad)
+
+        scores[present] = score
+        deviations[present] = deviation
+        return scores, deviations
+
+    def update(self, df):
+        """Score rows newer than everything seen so far and remember them for the next update"""
+        frame = self._frame(df).assign(new=True, dev_category=np.nan, dev_merchant=np.nan)
+        combined = frame if self.history is None else pd.concat([self.history, frame])
+        # Time order; ties go to earlier updates, then row labels, so input order doesn't matter
+        combined = combined.reset_index(names='row').sort_values(['date', 'new', 'row'], kind='stable')
+
+        result = pd.DataFrame(index=combined.index)
+        for name, keys in ANOMALY_GROUPS.items():
+            result[f'{name}_score'], combined[f'dev_{name}'] = self._score_group(combined, keys, name)
+        result['anomaly_score'] = result['merchant_score'].fillna(result['category_score'])
+        result['is_anomaly'] = result['anomaly_score'] > self.threshold
+
+        # Keep only what the next update's windows can reach
+        keep = np.zeros(len(combined), dtype=bool)
+        for keys in ANOMALY_GROUPS.values():
+            keep |= (combined.groupby(keys, sort=False).cumcount(ascending=False) < self.window).to_numpy()
+        self.history = combined[keep].set_index('row').assign(new=False)
+        self.history.index.name = None
+
+        new = combined['new'].to_numpy()
+        scores = result[new]
+        scores.index = combined.loc[new, 'row'].to_numpy()
+        return scores.reindex(df.index)
+
+    def score(self, df):
+        """Score a whole frame from scratch"""
+        self.history = None
+        return self.update(df)
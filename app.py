@@ -1,8 +1,6 @@
 import streamlit as st
-import pandas as pd
-from bs4 import BeautifulSoup
-import re
 import plotly.express as px
+from data_processor import DataProcessor
 
 # App config
 st.set_page_config(page_title="Ledger of Legends", layout="wide")
@@ -13,26 +11,10 @@ uploaded_file = st.file_uploader("📂 Upload your Ledger Activity HTML", type=[
 
 if uploaded_file is not None:
     # Parse HTML
-    soup = BeautifulSoup(uploaded_file, "html.parser")
-    transactions = []
-
-    for entry in soup.find_all("div", class_="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"):
-        text = entry.get_text(separator=" ").strip()
-
-        date_match = re.search(r"\w+\s\d{1,2},\s\d{4}", text)
-        amount_match = re.search(r"₹[\d,]+(\.\d{1,2})?", text)
-
-        if date_match and amount_match:
-            transactions.append({
-                "date": pd.to_datetime(date_match.group(), format='mixed'),
-                "amount": float(amount_match.group().replace("₹", "").replace(",", "")),
-                "description": text
-            })
-
-    if transactions:
-        df = pd.DataFrame(transactions)
-        df["type"] = df["description"].apply(lambda x: "Credit" if "received" in x.lower() else "Debit")
+    df = DataProcessor().parse_html_stream(uploaded_file)
+    df = df.drop(columns=['raw_text'])
 
+    if not df.empty:
         # Sidebar Filters - minimal style
         st.sidebar.header("🔍 Smart Filters")
         min_date, max_date = df["date"].min(), df["date"].max()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Ledger of Legends data processing
+
+Usage:
+    python benchmark.py html --rows 20000
+    python benchmark.py rolling --rows 1000000
+    python benchmark.py near_duplicates --rows 1000000
+    python benchmark.py categorize --rows 1000000
+    python benchmark.py charts --rows 1000000
+"""
+
+import argparse
+import io
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from ai_agent import KeywordMatcher
+from config import Config
+from data_processor import DataProcessor, ACTIVITY_ENTRY_CLASS, rolling_statistics
+from visualizations import FinanceVisualizations
+
+MERCHANTS = ['Swiggy', 'Zomato', 'Uber', 'Amazon', 'Flipkart', 'Netflix', 'Apollo Pharmacy', 'Airtel Recharge']
+
+
+def make_activity_html(rows, seed=42):
+    """Build a synthetic Google Pay "My Activity.html" export"""
+    rng = random.Random(seed)
+    start = datetime(2019, 1, 1)
+    parts = ['<html><body><div class="mdl-grid">']
+    for _ in range(rows):
+        date = start + timedelta(days=rng.randint(0, 5 * 365), seconds=rng.randint(0, 86399))
+        amount = rng.uniform(10, 50000)
+        verb, preposition = ('Received', 'from') if rng.random() < 0.3 else ('Paid', 'to')
+        parts.append(
+            '<div class="outer-cell mdl-cell mdl-cell--12-col mdl-shadow--2dp"><div class="mdl-grid">'
+            '<div class="header-cell mdl-cell mdl-cell--12-col"><p class="mdl-typography--title">Google Pay<br></p></div>'
+            f'<div class="{ACTIVITY_ENTRY_CLASS}">{verb} ₹{amount:,.2f} {preposition} {rng.choice(MERCHANTS)}<br>'
+            f'Using Bank Account XXXXXX{rng.randint(1000, 9999)}<br>{date:%b %d, %Y, %I:%M:%S %p} GMT+05:30<br></div>'
+            f'<div class="{ACTIVITY_ENTRY_CLASS} mdl-typography--text-right"></div>'
+            '</div></div>'
+        )
+    parts.append('</div></body></html>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def make_transactions(rows, seed=42):
+    """Build a synthetic standardized transaction frame"""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 5 * 365 * 86400, rows)
+    return pd.DataFrame({
+        'date': pd.Timestamp('2019-01-01') + pd.to_timedelta(seconds, unit='s'),
+        'amount': rng.uniform(10, 50000, rows).round(2),
+        'type': rng.choice(['Credit', 'Debit'], rows, p=[0.3, 0.7]),
+        'description': rng.choice(MERCHANTS, rows)
+    })
+
+
+def measure(func, *args):
+    """Run func once and return (result, wall seconds, peak traced bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(name, rows, elapsed, peak):
+    print(f"{name:<28} {rows:>10,} rows  {elapsed:>8.2f} s  {peak / 1024 / 1024:>9.1f} MB peak")
+
+
+def bench_html(args):
+    """Compare the BeautifulSoup tree parser with the streaming parser"""
+    content = make_activity_html(args.rows)
+    print(f"Synthetic export: {len(content) / 1024 / 1024:.1f} MB, {args.rows:,} entries")
+    processor = DataProcessor()
+
+    df, elapsed, peak = measure(processor.parse_html_file, io.BytesIO(content))
+    report('parse_html_file (tree)', len(df), elapsed, peak)
+
+    df, elapsed, peak = measure(processor.parse_html_stream, io.BytesIO(content))
+    report('parse_html_stream', len(df), elapsed, peak)
+
+
+def bench_rolling(args):
+    """Compare row-count groupby rolling with the time-window engine"""
+    df = make_transactions(args.rows)
+    print(f"Synthetic frame: {args.rows:,} rows")
+
+    def row_count_rolling(df):
+        return {
+            window: df.groupby('type')['amount'].rolling(window, min_periods=1).mean().reset_index(0, drop=True)
+            for window in (7, 30)
+        }
+
+    def pandas_time_rolling(df):
+        ordered = df.sort_values(['type', 'date']).set_index('date')
+        return {
+            window: ordered.groupby('type')['amount'].rolling(window).agg(['mean', 'sum', 'count'])
+            for window in ('7D', '30D')
+        }
+
+    _, elapsed, peak = measure(row_count_rolling, df)
+    report('groupby rolling(7/30 rows)', len(df), elapsed, peak)
+
+    _, elapsed, peak = measure(pandas_time_rolling, df)
+    report('groupby rolling(7D/30D)', len(df), elapsed, peak)
+
+    _, elapsed, peak = measure(rolling_statistics, df)
+    report('rolling_statistics', len(df), elapsed, peak)
+
+
+def bench_near_duplicates(args):
+    """Time sort-based near-duplicate detection across two interleaved sources"""
+    df = make_transactions(args.rows)
+    df['source_file'] = np.where(np.arange(args.rows) % 2, 'bank.csv', 'activity.html')
+    print(f"Synthetic frame: {args.rows:,} rows")
+
+    near, elapsed, peak = measure(DataProcessor().detect_near_duplicates, df)
+    report('detect_near_duplicates', len(df), elapsed, peak)
+    print(f"{near['cluster'].nunique():,} clusters, {len(near):,} transactions")
+
+
+def bench_categorize(args):
+    """Compare the per-row keyword loop with the compiled keyword matcher"""
+    rng = np.random.default_rng(42)
+    merchants = pd.Series(rng.choice(MERCHANTS + ['Local Kirana', 'Ramesh Kumar'], args.rows))
+    references = pd.Series(rng.integers(10 ** 9, 10 ** 10, args.rows)).astype(str)
+    descriptions = 'Paid to ' + merchants + ' UPI ref ' + references
+    print(f"Synthetic descriptions: {args.rows:,} rows, {descriptions.nunique():,} distinct")
+
+    def keyword_loop(descriptions):
+        def get_category(description):
+            description_lower = description.lower()
+            for category, keywords in Config.AI_CATEGORIES.items():
+                if any(keyword in description_lower for keyword in keywords):
+                    return category
+            return 'Other'
+        return descriptions.apply(get_category)
+
+    expected, elapsed, peak = measure(keyword_loop, descriptions)
+    report('apply(keyword loop)', len(descriptions), elapsed, peak)
+
+    matcher = KeywordMatcher(Config.AI_CATEGORIES)
+    categories, elapsed, peak = measure(matcher.categorize, descriptions)
+    report('KeywordMatcher.categorize', len(descriptions), elapsed, peak)
+    print(f"Identical results: {categories.equals(expected)}")
+
+
+def bench_charts(args):
+    """Figure build time and JSON size of the anomaly scatter with and without the point budget"""
+    df = make_transactions(args.rows)
+    rng = np.random.default_rng(42)
+    scores = pd.DataFrame({'is_anomaly': rng.random(args.rows) < 0.002, 'anomaly_score': 5.0}, index=df.index)
+    print(f"Synthetic frame: {args.rows:,} rows, {int(scores['is_anomaly'].sum()):,} anomalies")
+
+    visualizations = FinanceVisualizations()
+    for name, budget in [('full', args.rows + 1), ('budgeted', Config.CHART_POINT_BUDGET)]:
+        Config.CHART_POINT_BUDGET = budget
+        fig, elapsed, peak = measure(visualizations.create_anomaly_detection, df, scores)
+        report(f'create_anomaly_detection ({name})', len(df), elapsed, peak)
+        print(f"  {sum(len(trace.x) for trace in fig.data):,} points, {len(fig.to_json()) / 1024 / 1024:.1f} MB JSON")
+
+
+BENCHMARKS = {
+    'html': bench_html,
+    'rolling': bench_rolling,
+    'near_duplicates': bench_near_duplicates,
+    'categorize': bench_categorize,
+    'charts': bench_charts,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ledger of Legends benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
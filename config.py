@@ -10,8 +10,16 @@ class Config:
     APP_DESCRIPTION = "Intelligent financial analysis and insights for your ledger data"
     
     # File settings
-    SUPPORTED_FORMATS = ['html', 'csv']
-    MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+    SUPPORTED_FORMATS = ['html', 'csv', 'json', 'ndjson']
+    MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+    CSV_CHUNK_SIZE = 100000  # rows per chunk for CSV ingestion
+    COMPACT_FRAMES = True  # categoricals and downcast date parts after processing
+    ARROW_STRINGS = False  # store descriptions as Arrow-backed strings
+    LAZY_ENHANCE = True  # derive enhance_data columns only when requested
+    PROFILE_MEMORY = False  # trace per-stage peak memory (always on when DEBUG=true)
+    NEAR_DUPLICATE_WINDOW = '1D'  # same amount within this span may be one payment
+    NEAR_DUPLICATE_SIMILARITY = 0.5  # minimum description token overlap
+    NEAR_DUPLICATE_MAX_CANDIDATES = 50  # following rows compared per transaction
     
     # Data processing settings
     DEFAULT_DATE_FORMAT = '%Y-%m-%d'
@@ -32,6 +40,28 @@ class Config:
         'Personal Care': ['salon', 'spa', 'beauty', 'gym', 'fitness', 'wellness', 'cosmetics', 'personal']
     }
     
+    # Clustering of transactions that match no category keyword
+    CLUSTER_OTHER_MERCHANTS = False
+    OTHER_CLUSTERS = 8
+    OTHER_CLUSTER_BATCH_SIZE = 1024
+    OTHER_CLUSTER_LABEL_TERMS = 3
+    
+    # Anomaly detection: trailing median/MAD per category and per merchant
+    ANOMALY_WINDOW = 30  # previous transactions in the same group
+    ANOMALY_MIN_HISTORY = 5  # transactions needed before a group is scored
+    ANOMALY_THRESHOLD = 3.5  # modified z-score above which a transaction is flagged
+    ANOMALY_MIN_MAD = 0.05  # MAD floor in log amount (~5%), for very regular payments
+    
+    # Recurring payments: (typical gap in days, tolerance in days) per period
+    RECURRING_PERIODS = {
+        'weekly': (7, 1),
+        'monthly': (30.44, 4),
+        'yearly': (365.25, 10)
+    }
+    RECURRING_MIN_OCCURRENCES = 3
+    RECURRING_AMOUNT_TOLERANCE = 0.05  # relative step between amounts of one series
+    RECURRING_MIN_REGULARITY = 0.75  # share of gaps that must fit the period
+    
     # Budget settings
     DEFAULT_MONTHLY_BUDGET = 50000
     BUDGET_WARNING_THRESHOLD = 0.8  # 80%
@@ -46,6 +76,7 @@ class Config:
         'danger': '#dc3545',
         'info': '#17a2b8'
     }
+    CHART_POINT_BUDGET = 5000  # points per trace before switching to WebGL and LTTB downsampling
     
     # Filter settings
     DEFAULT_DATE_RANGE_DAYS = 365
@@ -57,6 +88,11 @@ class Config:
     
     # Performance settings
     CACHE_TTL = 3600  # 1 hour
+    CACHE_DIR = '.ledger_cache'
+    CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1GB
+    MERCHANT_CACHE_SIZE = 10000  # merchant keys kept by the categorization LRU
+    MERCHANT_CACHE_FILE = 'merchant_categories.json'  # stored under CACHE_DIR
+    FIGURE_CACHE_SIZE = 128  # rendered charts kept per server, expiring after CACHE_TTL
     MAX_ROWS_DISPLAY = 1000
     
     # Notification settings
@@ -70,7 +106,9 @@ class Config:
             'debug': os.getenv('DEBUG', 'False').lower() == 'true',
             'log_level': os.getenv('LOG_LEVEL', 'INFO'),
             'max_file_size': int(os.getenv('MAX_FILE_SIZE', cls.MAX_FILE_SIZE)),
-            'cache_ttl': int(os.getenv('CACHE_TTL', cls.CACHE_TTL))
+            'cache_ttl': int(os.getenv('CACHE_TTL', cls.CACHE_TTL)),
+            'cache_dir': os.getenv('CACHE_DIR', cls.CACHE_DIR),
+            'cache_max_bytes': int(os.getenv('CACHE_MAX_BYTES', cls.CACHE_MAX_BYTES))
         }
     
     @classmethod
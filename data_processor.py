@@ -1,185 +1,926 @@
+import io
+import os
+import time
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
 import numpy as np
 from bs4 import BeautifulSoup
 import re
+import codecs
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import json
+from config import Config
+from profiling import StageProfiler, get_logger
+
+logger = get_logger(__name__)
+
+# Class attribute of the divs holding one Google Pay activity entry
+ACTIVITY_ENTRY_CLASS = "content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"
+HTML_CHUNK_SIZE = 1024 * 1024
+
+# Bump whenever parsing or enhancement output changes, to invalidate cached uploads
+PARSER_VERSION = 11
+HTML_BATCH_SIZE = 50000
+JSON_BATCH_SIZE = 50000
+# Odd 64-bit constant mixing each row's content hash with its type, category and label hash
+FINGERPRINT_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Patterns for the fields inside an activity entry's text
+DATE_PATTERN = re.compile(r"(\w+\s\d{1,2},\s\d{4})")
+AMOUNT_PATTERN = re.compile(r"₹([\d,]+(?:\.\d{1,2})?)")
+MERCHANT_PATTERN = re.compile(r"\b(?:to|from)\s+(.+?)(?=\s+Using\b|\s+\w+\s\d{1,2},\s\d{4}|$)")
+ENTRY_DATE_FORMAT = '%b %d, %Y'
+
+# Long cleaned amount text is converted to paise without going through float
+PAISE_PATTERN = re.compile(r"^(-?)(\d+)(?:\.(\d{1,2}))?$")
+
+# Standardized transaction columns and the source names they are mapped from
+STANDARD_COLUMNS = ['date', 'amount', 'amount_paise', 'description', 'type']
+# Source columns kept alongside the standard ones when an export has them
+OPTIONAL_COLUMNS = ['category']
+COLUMN_MAPPING = {
+    'date': ['date', 'Date', 'DATE', 'transaction_date', 'Transaction Date', 'time'],
+    'amount': ['amount', 'Amount', 'AMOUNT', 'value', 'Value', 'transaction_amount'],
+    'description': ['description', 'Description', 'DESCRIPTION', 'details', 'Details', 'transaction_details', 'title'],
+    'type': ['type', 'Type', 'TYPE', 'transaction_type', 'Transaction Type']
+}
+
+# Compact mode: repeated strings become categoricals, date parts are downcast
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CATEGORICAL_COLUMNS = ['type', 'category', 'merchant', 'source_file']
+COMPACT_DTYPES = {
+    'year': 'int16',
+    'month': 'int8',
+    'day': 'int8',
+    'hour': 'int8',
+    'quarter': 'int8',
+    'week_of_year': 'int8',
+    'transaction_count': 'int32'
+}
+
+# Time windows and statistics for rolling features
+ROLLING_WINDOWS = ('7D', '30D')
+ROLLING_STATS = ('mean', 'sum', 'count')
+ROLLING_SUFFIXES = {'mean': 'avg', 'sum': 'sum', 'count': 'count'}
+
+# Columns used to build a description when the export has none
+DESCRIPTION_SOURCES = {
+    'Name': ('', ''),
+    'Payment Method': ('via ', ''),
+    'Status': ('(', ')')
+}
+
+# Description tokens compared by near-duplicate detection; boilerplate, masks and dates carry no signal
+DESCRIPTION_TOKEN_PATTERN = re.compile(r"\b(?!x+\b)[a-z]{3,}\b")
+DESCRIPTION_STOPWORDS = frozenset([
+    'paid', 'received', 'sent', 'from', 'using', 'via', 'bank', 'account', 'upi',
+    'payment', 'transfer', 'txn', 'ref', 'completed', 'successful', 'success', 'failed', 'pending',
+    'card', 'wallet', 'the', 'and', 'for', 'gmt',
+    'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'
+])
+
+# Parts of a lowercased description that vary between payments to the same merchant.
+# Letters are only removed as whole month names, masks or single letters between digits,
+# so a key keeps every keyword of its description ("ola0 cabs" stays "ola cabs")
+MERCHANT_NOISE_PATTERN = re.compile('|'.join([
+    r"(?:₹|\brs\.?|\binr)\s*[\d,]+(?:\.\d+)?",
+    r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)(?:uary|ruary|ch|il|e|y|ust|tember|ober|ember)?\.?"
+    r"\s+\d+(?:st|nd|rd|th)?\b,?(?:\s+\d+\b)?",
+    r"\b\d+[/.-]\d+[/.-]\d+\b",
+    r"\b\d+:\d+(?::\d+)?(?:\s*[ap]m\b)?",
+    r"\bgmt[+-]?[\d:]*",
+    # Digit runs and reference IDs whose letters are single characters between digits
+    r"\b[a-z]?\d+(?:[a-z]\d+)*[a-z]?\b",
+    r"\bx{2,}\d*\b"
+]))
+
+
+class ActivityHTMLParser(HTMLParser):
+    """Event-based parser that collects the text of each activity entry"""
 
-class DataProcessor:
     def __init__(self):
-        self.supported_formats = ['html', 'csv', 'json']
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self._depth = 0
+        self._parts = []
+        # feed() flushes text at chunk boundaries; only a tag starts a new text node
+        self._joined = False
+
+    def handle_starttag(self, tag, attrs):
+        self._joined = False
+        if tag != 'div':
+            return
+        if self._depth:
+            # Nested div inside an entry
+            self._depth += 1
+            return
+        css_class = dict(attrs).get('class') or ''
+        if ' '.join(css_class.split()) == ACTIVITY_ENTRY_CLASS:
+            self._depth = 1
+            self._parts = []
+
+    def handle_endtag(self, tag):
+        self._joined = False
+        if tag != 'div' or not self._depth:
+            return
+        self._depth -= 1
+        if not self._depth:
+            # Same text BeautifulSoup's get_text(separator=" ").strip() gives
+            self.entries.append(" ".join(self._parts).strip())
+            self._parts = []
+
+    def handle_data(self, data):
+        if not self._depth:
+            return
+        if self._joined:
+            self._parts[-1] += data
+        else:
+            self._parts.append(data)
+            self._joined = True
+
+
+def _iter_text_chunks(file_content, chunk_size=HTML_CHUNK_SIZE):
+    """Yield decoded text chunks from markup, bytes or a file-like object"""
+    if isinstance(file_content, str):
+        for start in range(0, len(file_content), chunk_size):
+            yield file_content[start:start + chunk_size]
+        return
+    if isinstance(file_content, (bytes, bytearray)):
+        file_content = io.BytesIO(file_content)
+
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    while True:
+        chunk = file_content.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_html_entries(file_content, chunk_size=HTML_CHUNK_SIZE):
+    """Stream the text of each activity entry without building a parse tree"""
+    parser = ActivityHTMLParser()
+    for chunk in _iter_text_chunks(file_content, chunk_size):
+        parser.feed(chunk)
+        if parser.entries:
+            yield from parser.entries
+            parser.entries = []
+    parser.close()
+    yield from parser.entries
+
+
+def parse_amount_paise(values):
+    """Parse amounts such as '₹1,23,456.78' or 1234.5 to exact integer paise"""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return (values.astype(float) * 100).round().astype('Int64')
+    
+    text = values.astype(str).str.replace(r"[₹,\s]", '', regex=True)
+    # Floats hold every amount below 2**51 paise exactly, so rounding recovers the paise
+    paise = (pd.to_numeric(text, errors='coerce') * 100).round().astype('Int64')
+    
+    # Longer amounts are split on the decimal point instead; other forms ('1e3') keep the rounding
+    long = text.str.len() > 15
+    if long.any():
+        parts = text[long].str.extract(PAISE_PATTERN)
+        rupees = pd.to_numeric(parts[1], errors='coerce').astype('Int64')
+        fraction = pd.to_numeric(parts[2].fillna('').str.ljust(2, '0'), errors='coerce').astype('Int64')
+        exact = rupees * 100 + fraction
+        exact = exact.where(parts[0] != '-', -exact)
+        paise[long] = exact.fillna(paise[long])
+    return paise
+
+
+def parse_dates(values, formats=None):
+    """Parse timestamps without inferring a format per chunk; pass one `formats` dict for all chunks of a file"""
+    values = pd.Series(values)
+    # ISO 8601 covers date-only, minutes, seconds, fractions and offsets value by value
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce', utc=True)
+    misses = dates.isna() & values.notna()
+    if misses.any():
+        # Other layouts use the file's first non-ISO value, read month-first then day-first
+        formats = {} if formats is None else formats
+        if 'fallback' not in formats:
+            first = str(values[misses].iloc[0])
+            guesses = [guess_datetime_format(first), guess_datetime_format(first, dayfirst=True)]
+            formats['fallback'] = list(dict.fromkeys(fmt for fmt in guesses if fmt))
+        for fmt in formats['fallback']:
+            if not misses.any():
+                break
+            dates[misses] = pd.to_datetime(values[misses], format=fmt, errors='coerce', utc=True)
+            misses = dates.isna() & values.notna()
+    # Whatever is left goes through the slow per-value parser
+    if misses.any():
+        dates[misses] = pd.to_datetime(values[misses], format='mixed', errors='coerce', utc=True)
+    # Offsets are normalized to naive UTC, as before
+    return dates.dt.tz_convert(None)
+
+
+def amount_paise(df):
+    """Integer paise for a transaction frame, derived from 'amount' if not stored"""
+    paise = df['amount_paise'] if 'amount_paise' in df.columns else parse_amount_paise(df['amount'])
+    # Nullable Int64 sums to pd.NA when empty; plain int64 whenever every amount parsed
+    if paise.dtype == 'Int64' and not paise.isna().any():
+        paise = paise.astype('int64')
+    return paise
+
+
+def format_inr(paise):
+    """Format integer paise as a rupee string for display"""
+    paise = int(paise)
+    sign = '-' if paise < 0 else ''
+    rupees, rest = divmod(abs(paise), 100)
+    return f"₹{sign}{rupees:,}.{rest:02d}"
+
+
+def _output_columns(df):
+    """Standard columns plus any optional source columns present"""
+    return STANDARD_COLUMNS + [col for col in OPTIONAL_COLUMNS if col in df.columns]
+
+
+def _drop_invalid(df):
+    """Drop rows without a date or amount; remaining amounts are int64 paise"""
+    df = df.dropna(subset=['date', 'amount_paise'])
+    return df.astype({'amount_paise': 'int64'})
+
+
+def rolling_statistics(df, windows=ROLLING_WINDOWS, stats=ROLLING_STATS, by=('type',), value='amount'):
+    """Rolling sum/count/mean over real time windows per group, in one sorted pass"""
+    n = len(df)
+    result = pd.DataFrame(index=df.index)
+    if n == 0:
+        return result
+    
+    # Sort once by group then time; every window reuses the same prefix sums
+    codes = df.groupby(list(by), observed=True, dropna=False, sort=False).ngroup().to_numpy()
+    seconds = df['date'].to_numpy(dtype='datetime64[s]').astype('int64')
+    order = np.lexsort((seconds, codes))
+    codes, seconds = codes[order], seconds[order]
+    values = df[value].to_numpy(dtype=float)[order]
+    
+    # Group-major composite key, monotonic over the sorted rows
+    span = seconds.max() - seconds.min() + 1
+    composite = codes * span + (seconds - seconds.min())
+    group_start = np.searchsorted(composite, codes * span, side='left')
+    prefix = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, n + 1)
+    
+    for window in windows:
+        # Like pandas time windows: (t - window, t], rows up to the current one
+        width = int(pd.Timedelta(window).total_seconds())
+        start = np.maximum(np.searchsorted(composite, composite - width, side='right'), group_start)
+        window_sum = prefix[end] - prefix[start]
+        window_count = end - start
+        computed = {'sum': window_sum, 'count': window_count, 'mean': window_sum / window_count}
+        for stat in stats:
+            column = np.empty(n, dtype=computed[stat].dtype)
+            column[order] = computed[stat]
+            result[f'rolling_{window.lower()}_{ROLLING_SUFFIXES[stat]}'] = column
+    
+    return result
+
+
+# Derived columns: name -> (columns it needs, function computing it from the frame)
+DERIVED_COLUMNS = {}
+
+
+def derived_column(name, requires=('date',)):
+    """Register a derived column that is computed on demand"""
+    def register(func):
+        DERIVED_COLUMNS[name] = (tuple(requires), func)
+        return func
+    return register
+
+
+@derived_column('year')
+def _derive_year(df):
+    return df['date'].dt.year
+
+
+@derived_column('month')
+def _derive_month(df):
+    return df['date'].dt.month
+
+
+@derived_column('day')
+def _derive_day(df):
+    return df['date'].dt.day
+
+
+@derived_column('day_of_week')
+def _derive_day_of_week(df):
+    return df['date'].dt.day_name()
+
+
+@derived_column('hour')
+def _derive_hour(df):
+    return df['date'].dt.hour
+
+
+@derived_column('quarter', requires=('month',))
+def _derive_quarter(df):
+    return (df['month'] - 1) // 3 + 1
+
+
+@derived_column('week_of_year')
+def _derive_week_of_year(df):
+    return df['date'].dt.isocalendar().week
+
+
+@derived_column('amount_category', requires=('amount',))
+def _derive_amount_category(df):
+    return pd.cut(
+        df['amount'],
+        bins=[0, 1000, 5000, 10000, 50000, float('inf')],
+        labels=['Small', 'Medium', 'Large', 'Very Large', 'Huge']
+    )
+
+
+@derived_column('transaction_count')
+def _derive_transaction_count(df):
+    return df.groupby(df['date'].dt.normalize()).cumcount() + 1
+
+
+@derived_column('rolling_7d_avg', requires=('date', 'amount', 'type'))
+def _derive_rolling_7d_avg(df):
+    return rolling_statistics(df, windows=('7D',), stats=('mean',))['rolling_7d_avg']
+
+
+@derived_column('rolling_30d_avg', requires=('date', 'amount', 'type'))
+def _derive_rolling_30d_avg(df):
+    return rolling_statistics(df, windows=('30D',), stats=('mean',))['rolling_30d_avg']
+
+
+def compact_column(name, values):
+    """Compact dtype for a derived column: downcast date parts, ordered weekday categorical"""
+    if name == 'day_of_week':
+        return pd.Categorical(values, categories=DAY_ORDER, ordered=True)
+    # Missing dates leave NA that small integer dtypes can't hold
+    if name in COMPACT_DTYPES and not values.isna().any():
+        return values.astype(COMPACT_DTYPES[name])
+    return values
+
+
+def ensure_columns(df, columns, compact=None):
+    """Compute the requested derived columns and their dependencies, memoized on df"""
+    if compact is None:
+        compact = Config.COMPACT_FRAMES
+    for name in columns:
+        if name in df.columns or name not in DERIVED_COLUMNS:
+            continue
+        requires, func = DERIVED_COLUMNS[name]
+        ensure_columns(df, requires, compact)
+        # Lazily derived columns get the dtypes compact_frame would have given them
+        df[name] = compact_column(name, func(df)) if compact else func(df)
+    return df
+
+
+# Row-level validation rules; each owns one bit of the uint8 validation_flags column
+VALIDATION_RULES = {}
+
+
+def validation_rule(name, message, label):
+    """Register a vectorized row check; message is formatted with the violation count"""
+    def register(func):
+        if len(VALIDATION_RULES) >= 8:
+            raise ValueError("validation_flags holds at most 8 rules")
+        VALIDATION_RULES[name] = {'bit': len(VALIDATION_RULES), 'check': func, 'message': message, 'label': label}
+        return func
+    return register
+
+
+@validation_rule('missing_fields', "Found {count} transactions with missing fields", "Missing fields")
+def _check_missing_fields(df, now):
+    present = [col for col in STANDARD_COLUMNS if col in df.columns]
+    return df[present].isna().any(axis=1).to_numpy()
+
+
+@validation_rule('invalid_amount', "Found {count} transactions with invalid amounts", "Invalid amount")
+def _check_invalid_amount(df, now):
+    return (amount_paise(df) <= 0).to_numpy(dtype=bool, na_value=False)
+
+
+@validation_rule('future_date', "Found {count} transactions with future dates", "Future date")
+def _check_future_date(df, now):
+    return (df['date'] > now).to_numpy()
+
+
+@validation_rule('old_date', "Found {count} transactions older than 10 years", "Older than 10 years")
+def _check_old_date(df, now):
+    return (df['date'] < now - timedelta(days=3650)).to_numpy()
+
+
+def validation_flags(df, now=None):
+    """Evaluate every validation rule into one uint8 bitmask per row"""
+    now = now or datetime.now()
+    flags = np.zeros(len(df), dtype=np.uint8)
+    for rule in VALIDATION_RULES.values():
+        flags |= rule['check'](df, now).astype(np.uint8) << rule['bit']
+    return flags
+
+
+def validation_counts(flags):
+    """Violations per rule; counts from separate chunks can simply be added"""
+    flags = np.asarray(flags, dtype=np.uint8)
+    bits = np.unpackbits(flags[:, None], axis=1, bitorder='little').sum(axis=0)
+    return {name: int(bits[rule['bit']]) for name, rule in VALIDATION_RULES.items()}
+
+
+def validation_mask(flags, rules=None):
+    """Rows violating any of the given rules (all rules by default)"""
+    names = VALIDATION_RULES if rules is None else rules
+    bitmask = sum(1 << VALIDATION_RULES[name]['bit'] for name in names)
+    return (np.asarray(flags, dtype=np.uint8) & bitmask) != 0
+
+
+def validation_issues(counts):
+    """Render rule counts as the prose issues shown to users"""
+    return [
+        VALIDATION_RULES[name]['message'].format(count=count)
+        for name, count in counts.items() if count
+    ]
+
+
+def extract_transactions(texts):
+    """Extract date, amount, merchant and type from activity entry texts in one vectorized pass"""
+    texts = pd.Series(list(texts), dtype=object)
+    dates = texts.str.extract(DATE_PATTERN, expand=False)
+    amounts = texts.str.extract(AMOUNT_PATTERN, expand=False)
+
+    # Entries without both a date and an amount are not transactions
+    found = dates.notna() & amounts.notna()
+    texts, dates, amounts = texts[found], dates[found], amounts[found]
+
+    # Fixed format first, the slow mixed-format parser only for misses
+    parsed_dates = pd.to_datetime(dates, format=ENTRY_DATE_FORMAT, errors='coerce')
+    misses = parsed_dates.isna()
+    if misses.any():
+        parsed_dates[misses] = pd.to_datetime(dates[misses], format='mixed', errors='coerce')
+
+    paise = parse_amount_paise(amounts)
+    df = pd.DataFrame({
+        'date': parsed_dates,
+        'amount': paise.astype(float) / 100,
+        'amount_paise': paise,
+        'description': texts,
+        'raw_text': texts,
+        'merchant': texts.str.extract(MERCHANT_PATTERN, expand=False),
+        'type': np.where(texts.str.contains('received', case=False, regex=False), 'Credit', 'Debit')
+    })
+    return _drop_invalid(df).reset_index(drop=True)
+
+
+def iter_html_batches(file_content, batch_size=HTML_BATCH_SIZE, chunk_size=HTML_CHUNK_SIZE):
+    """Stream a Google Pay HTML activity file as extracted transaction batches"""
+    texts = []
+    for text in iter_html_entries(file_content, chunk_size):
+        texts.append(text)
+        if len(texts) >= batch_size:
+            yield extract_transactions(texts)
+            texts = []
+    if texts:
+        yield extract_transactions(texts)
+
+
+def _iter_json_array(chunks, buffer):
+    """Yield the elements of a top-level JSON array as they are decoded"""
+    decoder = json.JSONDecoder()
+    separator = re.compile(r'[\s,]*')
+    pos = buffer.index('[') + 1
+    while True:
+        pos = separator.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element spans the chunk boundary; read on and retry
+            more = next(chunks, None)
+            if more is None:
+                raise
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        yield record
+
+
+def _iter_ndjson(chunks, buffer):
+    """Yield one decoded object per non-empty line"""
+    while True:
+        lines = buffer.split('\n')
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        more = next(chunks, None)
+        if more is None:
+            break
+        buffer += more
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def iter_json_records(file_content, chunk_size=HTML_CHUNK_SIZE):
+    """Stream records from a JSON array or NDJSON file without loading it whole"""
+    chunks = _iter_text_chunks(file_content, chunk_size)
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        if buffer.strip():
+            break
+    if buffer.lstrip().startswith('['):
+        yield from _iter_json_array(chunks, buffer)
+    else:
+        yield from _iter_ndjson(chunks, buffer)
+
+
+class DataProcessor:
+    def __init__(self, streaming_html=True, csv_chunksize=Config.CSV_CHUNK_SIZE,
+                 compact=Config.COMPACT_FRAMES, arrow_strings=Config.ARROW_STRINGS,
+                 lazy=Config.LAZY_ENHANCE):
+        self.supported_formats = ['html', 'csv', 'json', 'ndjson']
+        self.streaming_html = streaming_html
+        self.csv_chunksize = csv_chunksize
+        self.compact = compact
+        self.arrow_strings = arrow_strings
+        self.lazy = lazy
+    
+    def output_options(self):
+        """Constructor options that change the processed frame, for cache keys"""
+        return {
+            'streaming_html': self.streaming_html,
+            'csv_chunksize': self.csv_chunksize,
+            'compact': self.compact,
+            'arrow_strings': self.arrow_strings,
+            'lazy': self.lazy
+        }
     
     def parse_html_file(self, file_content):
         """Parse Google Pay HTML activity file"""
         soup = BeautifulSoup(file_content, "html.parser")
-        transactions = []
         
         # Look for transaction entries
-        for entry in soup.find_all("div", class_="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"):
-            text = entry.get_text(separator=" ").strip()
-            
-            # Extract date
-            date_match = re.search(r"\w+\s\d{1,2},\s\d{4}", text)
-            if not date_match:
-                continue
-                
-            # Extract amount
-            amount_match = re.search(r"₹[\d,]+(\.\d{1,2})?", text)
-            if not amount_match:
-                continue
-            
-            try:
-                date = pd.to_datetime(date_match.group(), format='mixed')
-                amount = float(amount_match.group().replace("₹", "").replace(",", ""))
-                
-                transactions.append({
-                    "date": date,
-                    "amount": amount,
-                    "description": text,
-                    "raw_text": text
-                })
-            except (ValueError, TypeError):
-                continue
+        texts = [
+            entry.get_text(separator=" ").strip()
+            for entry in soup.find_all("div", class_=ACTIVITY_ENTRY_CLASS)
+        ]
+        return extract_transactions(texts)
+    
+    def parse_html_stream(self, file_content, chunk_size=HTML_CHUNK_SIZE):
+        """Parse Google Pay HTML activity file with bounded memory"""
+        batches = list(iter_html_batches(file_content, chunk_size=chunk_size))
+        if not batches:
+            return extract_transactions([])
+        return pd.concat(batches, ignore_index=True)
+    
+    def _resolve_columns(self, columns, source='CSV'):
+        """Map each standard column name to the first matching source column"""
+        sources = {}
+        for standard_name, possible_names in COLUMN_MAPPING.items():
+            for col_name in possible_names:
+                if col_name in columns:
+                    sources[standard_name] = col_name
+                    break
+        
+        # Ensure required columns exist
+        if 'date' not in sources:
+            raise ValueError(f"Date column not found in {source}")
+        if 'amount' not in sources:
+            raise ValueError(f"Amount column not found in {source}")
+        return sources
+    
+    def _standardize_columns(self, df, sources, date_formats=None):
+        """Apply column mapping, type coercion and type inference to a frame or chunk"""
+        # Map columns
+        for standard_name, col_name in sources.items():
+            if standard_name != col_name:
+                df[standard_name] = df[col_name]
+        
+        # Convert data types
+        df['date'] = parse_dates(df['date'], date_formats)
+        df['amount_paise'] = parse_amount_paise(df['amount'])
+        df['amount'] = df['amount_paise'].astype(float) / 100
         
-        return pd.DataFrame(transactions)
+        # Determine transaction type if not present
+        if 'type' not in df.columns:
+            # Heuristic: infer from description or status, otherwise alternate
+            if 'description' in df.columns:
+                is_credit = df['description'].astype(str).str.contains('received|credited', case=False)
+            elif 'Status' in df.columns:
+                is_credit = df['Status'].astype(str).str.lower() == 'success'
+            else:
+                # Chunks keep their position in the file, so this matches a whole-file read
+                is_credit = df.index % 3 == 0
+            df['type'] = np.where(is_credit, 'Credit', 'Debit')
+        
+        # Build a description from available columns if there is none
+        if 'description' not in df.columns:
+            description = None
+            for col_name, (prefix, suffix) in DESCRIPTION_SOURCES.items():
+                if col_name in df.columns:
+                    part = prefix + df[col_name].astype(str) + suffix
+                    description = part if description is None else description + ' ' + part
+            df['description'] = 'Transaction' if description is None else description
+        
+        return df
     
     def parse_csv_file(self, file_content):
         """Parse CSV file with flexible column mapping"""
+        if self.csv_chunksize:
+            return self.parse_csv_chunked(file_content, self.csv_chunksize)
         try:
-            df = pd.read_csv(file_content)
-            
-            # Standardize column names
-            column_mapping = {
-                'date': ['date', 'Date', 'DATE', 'transaction_date', 'Transaction Date'],
-                'amount': ['amount', 'Amount', 'AMOUNT', 'value', 'Value', 'transaction_amount'],
-                'description': ['description', 'Description', 'DESCRIPTION', 'details', 'Details', 'transaction_details'],
-                'type': ['type', 'Type', 'TYPE', 'transaction_type', 'Transaction Type']
-            }
-            
-            # Map columns
-            for standard_name, possible_names in column_mapping.items():
-                for col_name in possible_names:
-                    if col_name in df.columns:
-                        df[standard_name] = df[col_name]
-                        break
-            
-            # Ensure required columns exist (support 'Date'/'Amount' as well)
-            if 'date' not in df.columns and 'Date' in df.columns:
-                df['date'] = df['Date']
-            if 'amount' not in df.columns and 'Amount' in df.columns:
-                df['amount'] = df['Amount']
-            if 'date' not in df.columns:
-                raise ValueError("Date column not found in CSV")
-            if 'amount' not in df.columns:
-                raise ValueError("Amount column not found in CSV")
-            
-            # Convert data types
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-            
-            # Determine transaction type if not present
-            if 'type' not in df.columns:
-                # Heuristic: try to infer from description, otherwise alternate
-                if 'description' in df.columns:
-                    df['type'] = df['description'].apply(
-                        lambda x: "Credit" if "received" in str(x).lower() or "credited" in str(x).lower() else "Debit"
-                    )
-                else:
-                    df = df.reset_index(drop=False)
-                    df['type'] = df['index'].apply(lambda i: 'Credit' if (i % 3 == 0) else 'Debit')
-                    df = df.drop(columns=['index'])
-            
-            return df.dropna(subset=['date', 'amount'])
+            # Text columns, like the chunked reader, so both modes coerce values the same way
+            df = pd.read_csv(file_content, dtype=str)
+            df = self._standardize_columns(df, self._resolve_columns(df.columns))
+            return _drop_invalid(df[_output_columns(df)]).reset_index(drop=True)
             
         except Exception as e:
             raise ValueError(f"Error parsing CSV file: {str(e)}")
     
-    def enhance_data(self, df):
-        """Add additional useful columns to the dataframe"""
+    def iter_csv_batches(self, file_content, chunksize=None):
+        """Stream a CSV file as standardized chunks, reading only the columns that are needed"""
+        chunksize = chunksize or Config.CSV_CHUNK_SIZE
+        
+        # Read the header alone to decide which columns to load
+        header = pd.read_csv(file_content, nrows=0).columns
+        if hasattr(file_content, 'seek'):
+            file_content.seek(0)
+        sources = self._resolve_columns(header)
+        
+        usecols = set(sources.values())
+        if 'description' not in sources:
+            usecols.update(col for col in DESCRIPTION_SOURCES if col in header)
+        if 'type' not in sources and 'Status' in header:
+            usecols.add('Status')
+        usecols.update(col for col in OPTIONAL_COLUMNS if col in header)
+        
+        # Declare every column as text up front; coercion happens per chunk
+        reader = pd.read_csv(
+            file_content,
+            usecols=list(usecols),
+            dtype={col: str for col in usecols},
+            chunksize=chunksize
+        )
+        
+        date_formats = {}
+        for chunk in reader:
+            chunk = self._standardize_columns(chunk, sources, date_formats)
+            yield _drop_invalid(chunk[_output_columns(chunk)])
+    
+    def parse_csv_chunked(self, file_content, chunksize=None):
+        """Parse CSV file in chunks, reading only the columns that are needed"""
+        try:
+            chunks = list(self.iter_csv_batches(file_content, chunksize))
+        except Exception as e:
+            raise ValueError(f"Error parsing CSV file: {str(e)}")
+        
+        if not chunks:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+        return pd.concat(chunks, ignore_index=True)
+    
+    def _standardize_records(self, records, row_offset=0, date_formats=None):
+        """Build a standardized frame from a batch of JSON records"""
+        df = pd.DataFrame.from_records(records)
+        df.index = pd.RangeIndex(row_offset, row_offset + len(df))
+        
+        # Nested values (e.g. Takeout 'products' and 'details') are not transaction fields
+        nested = [
+            col for col in df.columns
+            if df[col].dtype == object and df[col].map(lambda v: isinstance(v, (list, dict))).any()
+        ]
+        df = df.drop(columns=nested)
+        
+        # Activity records carry the amount inside the title
+        if not any(col in df.columns for col in COLUMN_MAPPING['amount']):
+            for col in COLUMN_MAPPING['description']:
+                if col in df.columns:
+                    amounts = df[col].astype(str).str.extract(AMOUNT_PATTERN, expand=False)
+                    df['amount'] = amounts.str.replace(',', '', regex=False)
+                    break
+        
+        df = self._standardize_columns(df, self._resolve_columns(df.columns, 'JSON'), date_formats)
+        return _drop_invalid(df[_output_columns(df)])
+    
+    def iter_json_batches(self, file_content, batch_size=JSON_BATCH_SIZE, chunk_size=HTML_CHUNK_SIZE):
+        """Stream a JSON or NDJSON file as standardized transaction batches"""
+        records = []
+        row_offset = 0
+        date_formats = {}
+        for record in iter_json_records(file_content, chunk_size):
+            if not isinstance(record, dict):
+                continue
+            records.append(record)
+            if len(records) >= batch_size:
+                yield self._standardize_records(records, row_offset, date_formats)
+                row_offset += len(records)
+                records = []
+        if records:
+            yield self._standardize_records(records, row_offset, date_formats)
+    
+    def parse_json_file(self, file_content, chunk_size=HTML_CHUNK_SIZE):
+        """Parse JSON array or NDJSON file with the same column mapping as CSV"""
+        try:
+            batches = list(self.iter_json_batches(file_content, chunk_size=chunk_size))
+        except Exception as e:
+            raise ValueError(f"Error parsing JSON file: {str(e)}")
+        
+        if not batches:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+        return pd.concat(batches, ignore_index=True)
+    
+    def enhance_data(self, df, columns=None):
+        """Add derived columns; in lazy mode only the ones requested"""
         if df.empty:
             return df
         
-        # Add time-based features
-        df['year'] = df['date'].dt.year
-        df['month'] = df['date'].dt.month
-        df['day'] = df['date'].dt.day
-        df['day_of_week'] = df['date'].dt.day_name()
-        df['hour'] = df['date'].dt.hour
-        df['quarter'] = df['date'].dt.quarter
-        df['week_of_year'] = df['date'].dt.isocalendar().week
-        
-        # Add amount-based features
-        df['amount_category'] = pd.cut(
-            df['amount'],
-            bins=[0, 1000, 5000, 10000, 50000, float('inf')],
-            labels=['Small', 'Medium', 'Large', 'Very Large', 'Huge']
-        )
+        # Everything else is computed when a chart, filter or insight asks for it
+        if columns is None:
+            columns = [] if self.lazy else list(DERIVED_COLUMNS)
+        return ensure_columns(df, columns, self.compact)
+    
+    def compact_frame(self, df, arrow_strings=False):
+        """Shrink the frame's memory footprint and report per-column savings"""
+        before = df.memory_usage(deep=True, index=False)
         
-        # Add transaction frequency
-        df['transaction_count'] = df.groupby(df['date'].dt.date).cumcount() + 1
+        # raw_text is an exact copy of description
+        df = df.drop(columns=['raw_text'], errors='ignore')
         
-        # Add rolling statistics
-        df['rolling_7d_avg'] = df.groupby('type')['amount'].rolling(7, min_periods=1).mean().reset_index(0, drop=True)
-        df['rolling_30d_avg'] = df.groupby('type')['amount'].rolling(30, min_periods=1).mean().reset_index(0, drop=True)
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        for col in ['day_of_week', *COMPACT_DTYPES]:
+            if col in df.columns:
+                df[col] = compact_column(col, df[col])
         
-        return df
+        if arrow_strings and 'description' in df.columns:
+            df['description'] = df['description'].astype('string[pyarrow]')
+        
+        after = df.memory_usage(deep=True, index=False)
+        report = pd.DataFrame({'before': before, 'after': after.reindex(before.index)}).fillna(0).astype('int64')
+        report['saved'] = report['before'] - report['after']
+        return df, report
     
-    def detect_duplicates(self, df):
-        """Detect and handle duplicate transactions"""
+    def detect_duplicates(self, df, hash_index=None):
+        """Detect and handle duplicate transactions, optionally against a persistent index"""
+        if df.empty:
+            return df, df.copy()
+        
         # Create a hash for each transaction
-        df['transaction_hash'] = df.apply(
-            lambda row: hash(f"{row['date']}_{row['amount']}_{row['description'][:50]}"), 
-            axis=1
-        )
+        df['transaction_hash'] = transaction_hash(df)
         
         duplicates = df[df.duplicated(subset=['transaction_hash'], keep=False)]
         unique_transactions = df.drop_duplicates(subset=['transaction_hash'], keep='first')
         
+        # Transactions already seen in earlier uploads
+        if hash_index is not None:
+            seen = hash_index.contains(unique_transactions['transaction_hash'])
+            duplicates = pd.concat([duplicates, unique_transactions[seen]])
+            unique_transactions = unique_transactions[~seen]
+        
         return unique_transactions, duplicates
     
-    def validate_data(self, df):
-        """Validate data quality and return issues"""
-        issues = []
+    def detect_near_duplicates(self, df, window=None, similarity=None, max_candidates=None):
+        """Cluster transactions with equal amounts, close timestamps and similar descriptions"""
+        window = pd.Timedelta(window or Config.NEAR_DUPLICATE_WINDOW)
+        similarity = Config.NEAR_DUPLICATE_SIMILARITY if similarity is None else similarity
+        max_candidates = max_candidates or Config.NEAR_DUPLICATE_MAX_CANDIDATES
+        columns = ['cluster', 'confidence'] + [
+            column for column in ('date', 'amount', 'description', 'source_file') if column in df.columns
+        ]
+        if len(df) < 2:
+            return pd.DataFrame(columns=columns)
         
-        # Check for missing values
-        missing_data = df.isnull().sum()
-        if missing_data.any():
-            issues.append(f"Missing data found: {missing_data[missing_data > 0].to_dict()}")
+        # Sort by (amount, time) so every candidate match sits a few rows below its partner
+        paise = amount_paise(df).to_numpy(dtype='int64')
+        seconds = df['date'].to_numpy(dtype='datetime64[s]').astype('int64')
+        order = np.lexsort((seconds, paise))
+        paise, seconds = paise[order], seconds[order]
+        sources = df['source_file'].to_numpy()[order] if 'source_file' in df.columns else None
+        limit = max(int(window.total_seconds()), 1)
         
-        # Check for invalid amounts
-        invalid_amounts = df[df['amount'] <= 0]
-        if not invalid_amounts.empty:
-            issues.append(f"Found {len(invalid_amounts)} transactions with invalid amounts")
+        # Compare row i with row i + lag; once no pair at some lag is within the window, none further can be
+        left, right = [], []
+        for lag in range(1, min(len(order), max_candidates + 1)):
+            close = (paise[lag:] == paise[:-lag]) & (seconds[lag:] - seconds[:-lag] <= limit)
+            if not close.any():
+                break
+            # The same payment appearing twice in one export is left to exact dedupe
+            if sources is not None:
+                close &= sources[lag:] != sources[:-lag]
+            hits = np.flatnonzero(close)
+            left.append(hits)
+            right.append(hits + lag)
+        if not left:
+            return pd.DataFrame(columns=columns)
+        left, right = np.concatenate(left), np.concatenate(right)
         
-        # Check for future dates
-        future_dates = df[df['date'] > datetime.now()]
-        if not future_dates.empty:
-            issues.append(f"Found {len(future_dates)} transactions with future dates")
+        # Description similarity is only computed for the few time/amount candidates
+        descriptions = df['description'].to_numpy()[order]
+        tokens = {position: description_tokens(descriptions[position]) for position in np.union1d(left, right)}
+        scores = np.array([_overlap(tokens[i], tokens[j]) for i, j in zip(left, right)])
+        closeness = 1 - (seconds[right] - seconds[left]) / limit
+        confidence = 0.7 * scores + 0.3 * closeness
+        matched = scores >= similarity
+        if not matched.any():
+            return pd.DataFrame(columns=columns)
         
-        # Check for very old dates (more than 10 years)
-        old_dates = df[df['date'] < datetime.now() - timedelta(days=3650)]
-        if not old_dates.empty:
-            issues.append(f"Found {len(old_dates)} transactions older than 10 years")
+        # Cluster confidence is its weakest link
+        roots = _clusters(zip(left[matched].tolist(), right[matched].tolist()))
+        edges = pd.DataFrame({'root': [roots[i] for i in left[matched].tolist()], 'confidence': confidence[matched]})
+        cluster_confidence = edges.groupby('root')['confidence'].min()
+        cluster_ids = {root: number for number, root in enumerate(sorted(cluster_confidence.index))}
         
-        return issues
+        members = np.fromiter(roots.keys(), dtype=np.int64, count=len(roots))
+        member_roots = np.fromiter(roots.values(), dtype=np.int64, count=len(roots))
+        near = df.iloc[order[members]].copy()
+        near.insert(0, 'cluster', [cluster_ids[root] for root in member_roots.tolist()])
+        near.insert(1, 'confidence', cluster_confidence.loc[member_roots].round(3).to_numpy())
+        return near[columns].sort_values(['cluster', 'date'], kind='stable')
     
-    def process_file(self, file_content, file_type):
-        """Main processing function"""
+    def validate_data(self, df):
+        """Validate data quality and return issues"""
+        if 'validation_flags' in df.columns:
+            flags = df['validation_flags']
+        else:
+            flags = validation_flags(df)
+        return validation_issues(validation_counts(flags))
+    
+    def iter_batches(self, file_content, file_type):
+        """Stream a file of any supported type as standardized, validation-flagged batches"""
+        if file_type == 'html':
+            batches = iter_html_batches(file_content)
+        elif file_type == 'csv':
+            batches = self.iter_csv_batches(file_content, self.csv_chunksize)
+        elif file_type in ('json', 'ndjson', 'jsonl'):
+            batches = self.iter_json_batches(file_content)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        return self._flag_batches(batches)
+    
+    def _flag_batches(self, batches):
+        # One reference time so rules agree across chunks
+        now = datetime.now()
+        for batch in batches:
+            batch['validation_flags'] = validation_flags(batch, now)
+            yield batch
+    
+    def parse_file(self, file_content, file_type):
+        """Parse a file into the standardized transaction frame"""
         if file_type == 'html':
-            df = self.parse_html_file(file_content)
+            if self.streaming_html:
+                return self.parse_html_stream(file_content)
+            return self.parse_html_file(file_content)
         elif file_type == 'csv':
-            df = self.parse_csv_file(file_content)
+            return self.parse_csv_file(file_content)
+        elif file_type in ('json', 'ndjson', 'jsonl'):
+            return self.parse_json_file(file_content)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def _build_result(self, df, hash_index=None, profiler=None):
+        """Enhance, deduplicate and validate a parsed frame"""
+        profiler = profiler or StageProfiler()
         
         # Enhance data
-        df = self.enhance_data(df)
+        with profiler.stage('enhance_data', len(df)) as stage:
+            df = self.enhance_data(df)
+            stage['rows_out'] = len(df)
         
         # Detect duplicates
-        df, duplicates = self.detect_duplicates(df)
+        with profiler.stage('detect_duplicates', len(df)) as stage:
+            rows_in = len(df)
+            df, duplicates = self.detect_duplicates(df, hash_index)
+            stage['rows_out'] = len(df)
+        # duplicate_count includes the kept copy of each duplicate; this is what was dropped
+        duplicates_removed = rows_in - len(df)
         
-        # Validate data
-        issues = self.validate_data(df)
+        # Validate data; streamed batches arrive already flagged
+        with profiler.stage('validate_data', len(df)) as stage:
+            if 'validation_flags' not in df.columns:
+                df['validation_flags'] = validation_flags(df)
+            validation = validation_counts(df['validation_flags'])
+            issues = validation_issues(validation)
+            stage['rows_out'] = len(df)
+        
+        memory = None
+        if self.compact and not df.empty:
+            with profiler.stage('compact_frame', len(df)) as stage:
+                df, report = self.compact_frame(df, self.arrow_strings)
+                stage['rows_out'] = len(df)
+            memory = {
+                'before_bytes': int(report['before'].sum()),
+                'after_bytes': int(report['after'].sum()),
+                'columns': report.reset_index(names='column').to_dict('records')
+            }
+        
+        if df.empty:
+            date_range = "n/a"
+        else:
+            date_range = f"{df['date'].min().strftime('%Y-%m-%d')} to {df['date'].max().strftime('%Y-%m-%d')}"
         
         return {
             'data': df,
@@ -187,8 +928,211 @@ class DataProcessor:
             'issues': issues,
             'summary': {
                 'total_transactions': len(df),
-                'date_range': f"{df['date'].min().strftime('%Y-%m-%d')} to {df['date'].max().strftime('%Y-%m-%d')}",
-                'total_amount': df['amount'].sum(),
-                'duplicate_count': len(duplicates)
+                'date_range': date_range,
+                'total_amount': amount_paise(df).sum() / 100,
+                'duplicate_count': len(duplicates),
+                'duplicates_removed': duplicates_removed,
+                'validation': validation,
+                'memory': memory,
+                'profile': profiler.records()
             }
         }
+    
+    def process_file(self, file_content, file_type):
+        """Main processing function"""
+        profiler = StageProfiler()
+        with profiler.stage('parse') as stage:
+            df = self.parse_file(file_content, file_type)
+            stage['rows_out'] = len(df)
+        
+        result = self._build_result(df, profiler=profiler)
+        profiler.log(logger, f"process_file({file_type})")
+        return result
+    
+    def process_files(self, files, max_workers=None, cache=None):
+        """Parse several (name, content, file_type) files in parallel and merge them"""
+        jobs = []
+        for name, file_content, file_type in files:
+            # File objects can't cross process boundaries; send their bytes
+            if hasattr(file_content, 'read'):
+                file_content = file_content.read()
+            jobs.append((name, file_content, file_type, self.streaming_html, self.csv_chunksize))
+        if not jobs:
+            raise ValueError("No files to process")
+        
+        # Uploads seen before (same bytes, same parser) load from the on-disk cache
+        cache_key = None
+        if cache is not None and all(isinstance(job[1], (bytes, bytearray)) for job in jobs):
+            cache_key = cache.key_for([(job[0], job[1]) for job in jobs], PARSER_VERSION, self.output_options())
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached['summary']['cache_hit'] = True
+                return cached
+        
+        profiler = StageProfiler()
+        with profiler.stage('parse') as stage:
+            if len(jobs) == 1:
+                parsed = [_parse_file_job(jobs[0])]
+            else:
+                workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = list(executor.map(_parse_file_job, jobs))
+            
+            # Merge in date order so duplicates across files are found in one pass
+            frames = [df.assign(source_file=name) for name, df, _ in parsed]
+            merged = pd.concat(frames, ignore_index=True)
+            merged = merged.sort_values('date', kind='stable').reset_index(drop=True)
+            stage['rows_out'] = len(merged)
+        
+        result = self._build_result(merged, profiler=profiler)
+        
+        # The same payment exported by two sources rarely hashes identically
+        if len(parsed) > 1:
+            with profiler.stage('detect_near_duplicates', len(result['data'])) as stage:
+                result['near_duplicates'] = self.detect_near_duplicates(result['data'])
+                stage['rows_out'] = len(result['near_duplicates'])
+            result['summary']['near_duplicate_clusters'] = int(result['near_duplicates']['cluster'].nunique())
+            result['summary']['profile'] = profiler.records()
+        profiler.log(logger, f"process_files({len(jobs)} files)")
+        result['summary']['file_timings'] = [
+            {'file': name, 'rows': len(df), 'seconds': round(seconds, 3)}
+            for name, df, seconds in parsed
+        ]
+        if cache_key is not None:
+            cache.put(cache_key, result)
+        return result
+    
+    def process_incremental(self, file_content, file_type, ledger, categorizer=None):
+        """Append only the transactions newer than the ledger's watermark"""
+        watermark = ledger.watermark()
+        
+        # Filter each batch as it is parsed so old history is never accumulated
+        parsed = 0
+        tails = []
+        for batch in self.iter_batches(file_content, file_type):
+            parsed += len(batch)
+            tails.append(_after_watermark(batch, watermark))
+        tail = pd.concat(tails, ignore_index=True) if tails else pd.DataFrame(columns=STANDARD_COLUMNS)
+        tail = tail.sort_values('date', kind='stable').reset_index(drop=True)
+        skipped = parsed - len(tail)
+        
+        # Enhance, deduplicate against the ledger's hash index and validate only the new tail
+        result = self._build_result(tail, ledger.hash_index)
+        # e.g. FinanceAIAgent.categorize_transactions, so stored partials carry categories
+        if categorizer is not None and not result['data'].empty:
+            result['data'] = categorizer(result['data'])
+        tail = result['data']
+        
+        if not tail.empty:
+            latest = tail['date'].max()
+            keys = set(tail.loc[tail['date'] == latest, 'transaction_hash'].tolist())
+            if watermark is not None and latest == watermark['date']:
+                keys |= watermark['keys']
+            ledger.append(tail, {'date': latest, 'keys': keys})
+        
+        result['summary']['parsed_transactions'] = parsed
+        result['summary']['skipped_transactions'] = skipped
+        return result
+
+
+def transaction_hash(df):
+    """Deterministic 64-bit hash of normalized date, amount and description prefix"""
+    description = df['description'].astype(str).str.replace(r"\s+", ' ', regex=True).str.strip()
+    normalized = pd.DataFrame({
+        'date': df['date'].to_numpy(dtype='datetime64[s]').astype('int64'),
+        'amount': amount_paise(df).to_numpy(dtype='int64'),
+        'description': description.str.lower().str[:50].astype(object).to_numpy()
+    })
+    # hash_pandas_object uses a fixed key, so values are stable across processes and sessions
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def frame_fingerprint(df):
+    """Order-independent fingerprint of a frame's rows, with their type, category and index label"""
+    if 'transaction_hash' in df.columns:
+        hashes = df['transaction_hash'].to_numpy(dtype=np.uint64)
+    else:
+        hashes = transaction_hash(df)
+    # The transaction hash ignores type and category, and session caches are sliced by index label
+    extra = [col for col in ('type', 'category') if col in df.columns]
+    labels = pd.util.hash_pandas_object(df[extra], index=True) if extra else pd.util.hash_pandas_object(df.index)
+    rows = hashes * np.uint64(FINGERPRINT_MULTIPLIER) + labels.to_numpy(dtype=np.uint64)
+    # uint64 arithmetic wraps, which is what we want here
+    return f"{len(df)}-{int(rows.sum(dtype=np.uint64)):016x}"
+
+
+def factorize_merchants(descriptions):
+    """Codes and unique merchant keys: descriptions without amounts, dates and reference numbers"""
+    # Collapsing digit runs first leaves far fewer distinct strings to clean
+    collapsed = descriptions.astype(str).str.lower().str.replace(r"\d+", '0', regex=True)
+    codes, uniques = pd.factorize(collapsed)
+    keys = (
+        pd.Series(uniques, dtype=object)
+        .str.replace(MERCHANT_NOISE_PATTERN, ' ', regex=True)
+        .str.replace(r"[^a-z&]+", ' ', regex=True)
+        .str.strip()
+    )
+    key_codes, merchant_keys = pd.factorize(keys)
+    # Missing descriptions keep code -1
+    key_codes = np.append(key_codes, -1)
+    return key_codes[codes], np.asarray(merchant_keys, dtype=object)
+
+
+def description_tokens(text):
+    """Significant lowercase word tokens of a description"""
+    return frozenset(DESCRIPTION_TOKEN_PATTERN.findall(str(text).lower())) - DESCRIPTION_STOPWORDS
+
+
+def _overlap(left, right):
+    """Share of the shorter token set found in the other; exports differ mostly in verbosity"""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / min(len(left), len(right))
+
+
+def _clusters(pairs):
+    """Union-find over (left, right) pairs; returns {member: root}"""
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for left, right in pairs:
+        root_left, root_right = find(left), find(right)
+        if root_left != root_right:
+            parent[max(root_left, root_right)] = min(root_left, root_right)
+    return {node: find(node) for node in parent}
+
+
+def _after_watermark(df, watermark):
+    """Discard rows at or before the watermark, keeping unseen rows on its date"""
+    if watermark is None or df.empty:
+        return df
+    keep = df['date'] > watermark['date']
+    at_mark = df['date'] == watermark['date']
+    if at_mark.any():
+        seen_hashes = np.fromiter(watermark['keys'], dtype=np.uint64, count=len(watermark['keys']))
+        unseen = ~np.isin(transaction_hash(df[at_mark]), seen_hashes)
+        keep.loc[df.index[at_mark.to_numpy()][unseen]] = True
+    return df[keep]
+
+
+def file_type_from_name(name):
+    """Infer the parser file type from a file name's extension"""
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    return 'ndjson' if extension == 'jsonl' else extension
+
+
+def _parse_file_job(job):
+    """Process pool worker: parse one file and time it"""
+    name, file_content, file_type, streaming_html, csv_chunksize = job
+    if isinstance(file_content, (bytes, bytearray)):
+        file_content = io.BytesIO(file_content)
+    start = time.perf_counter()
+    processor = DataProcessor(streaming_html=streaming_html, csv_chunksize=csv_chunksize)
+    df = processor.parse_file(file_content, file_type)
+    return name, df, time.perf_counter() - start
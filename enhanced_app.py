@@ -5,15 +5,27 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import altair as alt
-from bs4 import BeautifulSoup
-import re
 from datetime import datetime, timedelta
 import calendar
 from ai_agent import FinanceAIAgent
+from data_processor import (
+    DataProcessor, file_type_from_name, format_inr, ensure_columns,
+    VALIDATION_RULES, validation_mask, frame_fingerprint
+)
+from aggregates import TransactionAggregate, daily_partials, filter_partials
+from anomalies import AnomalyDetector
+from visualizations import FinanceVisualizations, downsample_points, scatter_trace, note_downsampling
+from storage import ParsedFrameCache, FigureCache
+from config import Config
 import warnings
+import logging
 import os
 warnings.filterwarnings('ignore')
 
+# Processing logs follow the LOG_LEVEL environment setting
+env_config = Config.get_environment_config()
+logging.basicConfig(level=env_config['log_level'].upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
 # Page configuration
 st.set_page_config(
     page_title="FinAlyze",
@@ -69,10 +81,78 @@ st.markdown("""
 # Initialize AI Agent
 @st.cache_resource
 def get_ai_agent():
-    return FinanceAIAgent()
+    # Shared across sessions so the merchant category cache warms up once
+    return FinanceAIAgent(os.path.join(env_config['cache_dir'], Config.MERCHANT_CACHE_FILE))
 
 ai_agent = get_ai_agent()
 
+def get_session_fingerprint(df):
+    """Fingerprint of a frame kept in session state, hashed once rather than on every rerun"""
+    cached = st.session_state.get('session_fingerprint')
+    if cached is None or cached[0] is not df:
+        cached = (df, frame_fingerprint(df))
+        st.session_state.session_fingerprint = cached
+    return cached[1]
+
+def get_dataset_analysis(df, fingerprint):
+    """Categorize the full dataset once per session and keep its daily partials"""
+    cached = st.session_state.get('dataset_analysis')
+    if cached is None or cached['fingerprint'] != fingerprint:
+        columns = [col for col in ['date', 'type', 'amount', 'amount_paise', 'description', 'category'] if col in df.columns]
+        categorized = df[columns].copy()
+        if 'category' not in categorized.columns:
+            categorized = ai_agent.categorize_transactions(categorized)
+        # Anomaly scores and recurring payments are added on first use; most reruns never need them
+        cached = {
+            'fingerprint': fingerprint,
+            'categorized': categorized,
+            'partials': daily_partials(categorized)
+        }
+        st.session_state.dataset_analysis = cached
+    return cached
+
+def get_dataset_anomalies(df, fingerprint):
+    """Anomaly scores of the full dataset, computed once per session when first shown"""
+    analysis = get_dataset_analysis(df, fingerprint)
+    if 'anomalies' not in analysis:
+        analysis['anomalies'] = AnomalyDetector().score(analysis['categorized'])
+    return analysis['anomalies']
+
+def get_dataset_recurring(df, fingerprint):
+    """Recurring payments of the full dataset, detected once per session when first shown"""
+    analysis = get_dataset_analysis(df, fingerprint)
+    if 'recurring' not in analysis:
+        analysis['recurring'] = ai_agent.detect_recurring_payments(analysis['categorized'])
+    return analysis['recurring']
+
+def get_derived_columns(df, fingerprint, columns):
+    """Derived columns of the full dataset, computed once per session and sliced by each filter"""
+    cached = st.session_state.get('derived_columns')
+    # The fingerprint covers index labels, so callers can slice the result with .loc on any filter
+    if cached is None or cached['fingerprint'] != fingerprint:
+        cached = {'fingerprint': fingerprint, 'frame': pd.DataFrame(index=df.index)}
+        st.session_state.derived_columns = cached
+    missing = [col for col in columns if col not in cached['frame'].columns]
+    if missing:
+        # Filtered frames are new slices on every rerun, so nothing memoized on them would be reused
+        base = pd.DataFrame({col: df[col] for col in ['date', 'amount', 'type'] if col in df.columns})
+        ensure_columns(base, missing)
+        for col in missing:
+            cached['frame'][col] = base[col]
+    return cached['frame'][columns]
+
+# Persistent cache of processed uploads, shared across sessions and restarts
+@st.cache_resource
+def get_frame_cache():
+    return ParsedFrameCache()
+
+# Rendered charts shared across sessions and reruns, keyed by dataset, filters and chart parameters
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+figure_cache = get_figure_cache()
+
 # Main header
 st.markdown("""
 <div class="main-header">
@@ -85,99 +165,59 @@ st.markdown("""
 st.sidebar.markdown("## 🎛️ Control Panel")
 
 # File upload with multiple format support
-uploaded_file = st.sidebar.file_uploader(
+uploaded_files = st.sidebar.file_uploader(
     "📂 Upload your Ledger Data",
-    type=["html", "csv"],
-    help="Upload an activity HTML file or CSV export"
+    type=["html", "csv", "json", "ndjson", "jsonl"],
+    accept_multiple_files=True,
+    help="Upload one or more activity HTML files, CSV exports or JSON/NDJSON exports"
 )
 
 # Data processing function
-@st.cache_data
-def process_data(uploaded_file):
-    if uploaded_file is None:
+@st.cache_data(ttl=Config.CACHE_TTL)
+def process_data(uploaded_files):
+    if not uploaded_files:
         return None
     
-    if uploaded_file.name.endswith('.html'):
-        # Parse HTML file
-        soup = BeautifulSoup(uploaded_file, "html.parser")
-        transactions = []
-        
-        for entry in soup.find_all("div", class_="content-cell mdl-cell mdl-cell--6-col mdl-typography--body-1"):
-            text = entry.get_text(separator=" ").strip()
-            
-            date_match = re.search(r"\w+\s\d{1,2},\s\d{4}", text)
-            amount_match = re.search(r"₹[\d,]+(\.\d{1,2})?", text)
-            
-            if date_match and amount_match:
-                transactions.append({
-                    "date": pd.to_datetime(date_match.group(), format='mixed'),
-                    "amount": float(amount_match.group().replace("₹", "").replace(",", "")),
-                    "description": text
-                })
-        
-        df = pd.DataFrame(transactions)
-        df["type"] = df["description"].apply(lambda x: "Credit" if "received" in x.lower() else "Debit")
-        
-    else:  # CSV file
-        df = pd.read_csv(uploaded_file)
-        # Standardize common column names
-        if 'Date' in df.columns and 'date' not in df.columns:
-            df['date'] = df['Date']
-        if 'Amount' in df.columns and 'amount' not in df.columns:
-            df['amount'] = df['Amount']
-        if 'Description' in df.columns and 'description' not in df.columns:
-            df['description'] = df['Description']
-        if 'Type' in df.columns and 'type' not in df.columns:
-            df['type'] = df['Type']
+    # Files are parsed in parallel, merged and deduplicated across files
+    files = [(f.name, f.getvalue(), file_type_from_name(f.name)) for f in uploaded_files]
+    result = DataProcessor().process_files(files, cache=get_frame_cache())
+    result['data'] = result['data'].drop(columns=['raw_text'], errors='ignore')
+    # Hashed once per upload; reruns get it back with the cached result
+    result['fingerprint'] = frame_fingerprint(result['data'])
+    return result
 
-        # Create description column if it doesn't exist
-        if 'description' not in df.columns:
-            # Try to build a description from available columns
-            desc_parts = []
-            if 'Name' in df.columns:
-                desc_parts.append(df['Name'].astype(str))
-            if 'Payment Method' in df.columns:
-                desc_parts.append('via ' + df['Payment Method'].astype(str))
-            if 'Status' in df.columns:
-                desc_parts.append('(' + df['Status'].astype(str) + ')')
-            
-            if desc_parts:
-                # Properly concatenate all parts
-                df['description'] = desc_parts[0]
-                for i in range(1, len(desc_parts)):
-                    df['description'] = df['description'] + ' ' + desc_parts[i]
-            else:
-                df['description'] = 'Transaction'
+# Process uploaded data
+result = process_data(uploaded_files)
+df = result['data'] if result is not None else None
 
-        # Coerce types
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        if 'amount' in df.columns:
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-        
-        # Infer type if still missing
-        if 'type' not in df.columns:
-            if 'Status' in df.columns:
-                # Use Status to determine type: Success = Credit, others = Debit
-                df['type'] = df['Status'].apply(lambda x: 'Credit' if str(x).lower() == 'success' else 'Debit')
-            elif 'description' in df.columns:
-                df['type'] = df['description'].apply(lambda x: 'Credit' if 'received' in str(x).lower() else 'Debit')
-            else:
-                # Default heuristic: mark every 3rd transaction as Credit
-                df = df.reset_index(drop=False)
-                df['type'] = df['index'].apply(lambda i: 'Credit' if (i % 3 == 0) else 'Debit')
-                df = df.drop(columns=['index'])
-    
-    return df
+if result is not None and len(uploaded_files) > 1:
+    with st.sidebar.expander("📁 Merged Files"):
+        st.caption(f"{result['summary']['duplicates_removed']} duplicate transactions removed across files")
+        st.dataframe(pd.DataFrame(result['summary']['file_timings']), use_container_width=True)
+        near_duplicates = result.get('near_duplicates')
+        if near_duplicates is not None and not near_duplicates.empty:
+            st.caption(f"{result['summary']['near_duplicate_clusters']} likely duplicate payments across files (kept)")
+            st.dataframe(near_duplicates, use_container_width=True)
 
-# Process uploaded data
-df = process_data(uploaded_file)
+if result is not None and env_config['debug']:
+    with st.sidebar.expander("🐞 Processing Profile"):
+        if result['summary'].get('cache_hit'):
+            st.caption("Loaded from cache; timings are from the original run")
+        st.dataframe(pd.DataFrame(result['summary']['profile']), use_container_width=True)
+        merchant_stats = ai_agent.merchant_cache.stats()
+        st.caption(
+            f"Merchant category cache: {merchant_stats['size']:,}/{merchant_stats['max_size']:,} keys, "
+            f"{merchant_stats['hit_rate']:.0%} hit rate ({merchant_stats['hits']:,} hits, {merchant_stats['misses']:,} misses)"
+        )
 
 # Use sample data if present in session and no file uploaded
 if df is None and 'sample_df' in st.session_state:
     df = st.session_state.sample_df
 
 if df is not None and not df.empty:
+    # Identifies the dataset for session analysis and the figure cache without rehashing rows each rerun
+    dataset_fingerprint = result['fingerprint'] if result is not None else get_session_fingerprint(df)
+    
     # Enhanced sidebar filters
     st.sidebar.markdown("### 🔍 Advanced Filters")
     
@@ -220,6 +260,13 @@ if df is not None and not df.empty:
             default=categories
         )
     
+    # Data quality filter over the precomputed validation bitmask
+    quality_filter = None
+    if 'validation_flags' in df.columns and df['validation_flags'].any():
+        quality_options = {"All transactions": None, "Any validation issue": list(VALIDATION_RULES)}
+        quality_options.update({rule['label']: [name] for name, rule in VALIDATION_RULES.items()})
+        quality_filter = quality_options[st.sidebar.selectbox("🩺 Data Quality", options=list(quality_options))]
+    
     # Apply filters
     filtered_df = df[
         (df["date"].dt.date >= date_range[0]) &
@@ -238,20 +285,54 @@ if df is not None and not df.empty:
     if 'category' in df.columns and selected_categories:
         filtered_df = filtered_df[filtered_df['category'].isin(selected_categories)]
     
+    if quality_filter:
+        filtered_df = filtered_df[validation_mask(filtered_df['validation_flags'], quality_filter)]
+    
+    # One (type, category, day) cube per filtered dataset feeds the metrics, charts and insights
+    full_amount_range = amount_range == (float(min_amount), float(max_amount))
+    row_filtered = not full_amount_range or bool(search_term) or bool(quality_filter)
+    if row_filtered:
+        cube = TransactionAggregate(filtered_df)
+    else:
+        # Date, type and category filters only select days and groups of precomputed partials
+        cube = TransactionAggregate(partials=filter_partials(
+            get_dataset_analysis(df, dataset_fingerprint)['partials'],
+            start=date_range[0], end=date_range[1], types=selected_types,
+            categories=(selected_categories or None) if 'category' in df.columns else None
+        ))
+    
+    # Widgets that don't change the filters reuse the figures rendered for this dataset and filter state
+    filter_state = {
+        'dates': tuple(date_range), 'types': selected_types, 'amounts': amount_range, 'search': search_term,
+        'categories': selected_categories if 'category' in df.columns else None, 'quality': quality_filter
+    }
+    
+    def cached_figure(chart, build, **params):
+        # The dataset fingerprint covers types, categories and index labels, not just row contents
+        key = FigureCache.key(dataset_fingerprint, filter_state, chart, dict(params, point_budget=Config.CHART_POINT_BUDGET))
+        return figure_cache.get_or_create(key, build)
+    
     # AI Analysis
+    cluster_other = st.sidebar.checkbox("🧩 Cluster uncategorized merchants", value=Config.CLUSTER_OTHER_MERCHANTS)
     if st.sidebar.button("🤖 Run AI Analysis"):
         with st.spinner("AI is analyzing your financial data..."):
-            # Categorize transactions
-            categorized_df = ai_agent.categorize_transactions(filtered_df.copy())
-            
-            # Get insights
-            insights = ai_agent.analyze_spending_patterns(categorized_df)
+            if not (row_filtered or cluster_other):
+                insights = ai_agent.analyze_spending_patterns(None, cube)
+            else:
+                # Categorize transactions
+                categorized_df = ai_agent.categorize_transactions(filtered_df.copy())
+                if cluster_other:
+                    categorized_df = ai_agent.cluster_uncategorized(categorized_df)
+                
+                # Get insights
+                insights = ai_agent.analyze_spending_patterns(categorized_df)
+                st.session_state.categorized_df = categorized_df
             recommendations = ai_agent.generate_recommendations(insights)
+            recommendations += ai_agent.anomaly_notifications(filtered_df, get_dataset_anomalies(df, dataset_fingerprint))
             
             # Store in session state
             st.session_state.ai_insights = insights
             st.session_state.ai_recommendations = recommendations
-            st.session_state.categorized_df = categorized_df
     
     # Main content area
     if not filtered_df.empty:
@@ -260,21 +341,23 @@ if df is not None and not df.empty:
         
         col1, col2, col3, col4 = st.columns(4)
         
+        # Totals are summed in integer paise and formatted only for display
+        total_spent = cube.total('Debit')
+        total_received = cube.total('Credit')
+        
         with col1:
-            total_spent = filtered_df[filtered_df['type'] == 'Debit']['amount'].sum()
-            st.metric("💸 Total Spent", f"₹{total_spent:,.2f}")
+            st.metric("💸 Total Spent", format_inr(total_spent))
         
         with col2:
-            total_received = filtered_df[filtered_df['type'] == 'Credit']['amount'].sum()
-            st.metric("💰 Total Received", f"₹{total_received:,.2f}")
+            st.metric("💰 Total Received", format_inr(total_received))
         
         with col3:
             net_flow = total_received - total_spent
-            st.metric("📈 Net Flow", f"₹{net_flow:,.2f}")
+            st.metric("📈 Net Flow", format_inr(net_flow))
         
         with col4:
-            avg_transaction = filtered_df['amount'].mean()
-            st.metric("📊 Avg Transaction", f"₹{avg_transaction:,.2f}")
+            avg_transaction = cube.total() / max(cube.count(), 1)
+            st.metric("📊 Avg Transaction", format_inr(round(avg_transaction)))
         
         # AI Insights Section
         if hasattr(st.session_state, 'ai_insights'):
@@ -293,18 +376,37 @@ if df is not None and not df.empty:
             # Category breakdown if available
             if 'top_categories' in st.session_state.ai_insights:
                 st.markdown("### 📂 Spending by Category")
-                category_data = pd.DataFrame(
-                    list(st.session_state.ai_insights['top_categories'].items()),
-                    columns=['Category', 'Amount']
-                )
+                top_categories = st.session_state.ai_insights['top_categories']
                 
-                fig_category = px.pie(
-                    category_data,
-                    values='Amount',
-                    names='Category',
-                    title="Top Spending Categories"
-                )
+                def build_category_chart():
+                    category_data = pd.DataFrame(list(top_categories.items()), columns=['Category', 'Amount'])
+                    return px.pie(
+                        category_data,
+                        values='Amount',
+                        names='Category',
+                        title="Top Spending Categories"
+                    )
+                fig_category = cached_figure('top_categories', build_category_chart, data=top_categories)
                 st.plotly_chart(fig_category, use_container_width=True)
+            
+            if st.session_state.ai_insights.get('other_clusters'):
+                st.markdown("### 🧩 Uncategorized Spending Clusters")
+                other_clusters = st.session_state.ai_insights['other_clusters']
+                
+                def build_cluster_chart():
+                    cluster_data = pd.DataFrame(list(other_clusters.items()), columns=['Cluster', 'Amount'])
+                    return px.bar(cluster_data, x='Amount', y='Cluster', orientation='h', title="Top 'Other' Merchant Clusters")
+                fig_clusters = cached_figure('other_clusters', build_cluster_chart, data=other_clusters)
+                st.plotly_chart(fig_clusters, use_container_width=True)
+            
+            recurring = get_dataset_recurring(df, dataset_fingerprint)
+            if not recurring.empty:
+                st.markdown("### 🔁 Recurring Payments")
+                st.caption(
+                    f"About ₹{recurring['monthly_cost'].sum():,.2f} per month across "
+                    f"{len(recurring)} subscriptions, SIPs and other recurring payments"
+                )
+                st.dataframe(recurring, use_container_width=True)
         
         # Enhanced Charts Section
         st.markdown("## 📈 Advanced Analytics")
@@ -314,27 +416,30 @@ if df is not None and not df.empty:
         
         with tab1:
             # Enhanced timeline chart
-            daily_data = filtered_df.groupby("date")["amount"].sum().reset_index()
-            
-            fig_timeline = go.Figure()
-            fig_timeline.add_trace(go.Scatter(
-                x=daily_data['date'],
-                y=daily_data['amount'],
-                mode='lines+markers',
-                name='Daily Spending',
-                line=dict(color='#667eea', width=2),
-                marker=dict(size=6)
-            ))
-            
-            fig_timeline.update_layout(
-                title="Daily Transaction Timeline",
-                xaxis_title="Date",
-                yaxis_title="Amount (₹)",
-                hovermode='x unified',
-                showlegend=True
-            )
+            def build_timeline():
+                daily_data = cube.timeline('D').rename('amount').rename_axis('date').reset_index()
+                points = downsample_points(daily_data['date'], daily_data['amount'])
+                
+                fig_timeline = go.Figure()
+                fig_timeline.add_trace(scatter_trace(len(daily_data))(
+                    x=daily_data['date'].iloc[points],
+                    y=daily_data['amount'].iloc[points],
+                    mode='lines+markers',
+                    name='Daily Spending',
+                    line=dict(color='#667eea', width=2),
+                    marker=dict(size=6)
+                ))
+                
+                fig_timeline.update_layout(
+                    title="Daily Transaction Timeline",
+                    xaxis_title="Date",
+                    yaxis_title="Amount (₹)",
+                    hovermode='x unified',
+                    showlegend=True
+                )
+                return note_downsampling(fig_timeline, len(points), len(daily_data))
             
-            st.plotly_chart(fig_timeline, use_container_width=True)
+            st.plotly_chart(cached_figure('timeline', build_timeline, freq='D'), use_container_width=True)
         
         with tab2:
             # Spending patterns analysis
@@ -342,50 +447,49 @@ if df is not None and not df.empty:
             
             with col1:
                 # Monthly spending pattern
-                monthly_data = filtered_df.groupby(filtered_df["date"].dt.to_period("M"))["amount"].sum().reset_index()
-                monthly_data["date"] = monthly_data["date"].astype(str)
-                
-                fig_monthly = px.bar(
-                    monthly_data,
-                    x="date",
-                    y="amount",
-                    title="Monthly Spending Pattern",
-                    color="amount",
-                    color_continuous_scale="viridis"
-                )
-                st.plotly_chart(fig_monthly, use_container_width=True)
+                def build_monthly():
+                    monthly_data = cube.timeline('M').rename('amount').rename_axis('date').reset_index()
+                    monthly_data["date"] = monthly_data["date"].astype(str)
+                    return px.bar(
+                        monthly_data,
+                        x="date",
+                        y="amount",
+                        title="Monthly Spending Pattern",
+                        color="amount",
+                        color_continuous_scale="viridis"
+                    )
+                st.plotly_chart(cached_figure('timeline', build_monthly, freq='M'), use_container_width=True)
             
             with col2:
                 # Transaction type distribution
-                type_data = filtered_df.groupby("type")["amount"].sum().reset_index()
-                fig_type = px.pie(
-                    type_data,
-                    values="amount",
-                    names="type",
-                    title="Credit vs Debit Distribution"
-                )
-                st.plotly_chart(fig_type, use_container_width=True)
+                def build_type_split():
+                    type_data = cube.totals('type').rename('amount').rename_axis('type').reset_index()
+                    return px.pie(
+                        type_data,
+                        values="amount",
+                        names="type",
+                        title="Credit vs Debit Distribution"
+                    )
+                st.plotly_chart(cached_figure('type_split', build_type_split), use_container_width=True)
         
         with tab3:
             # Advanced insights
             col1, col2 = st.columns(2)
             
             with col1:
-                # Spending heatmap by day of week
-                filtered_df['day_of_week'] = filtered_df['date'].dt.day_name()
-                filtered_df['hour'] = filtered_df['date'].dt.hour
-                
-                day_hour_data = filtered_df.groupby(['day_of_week', 'hour'])['amount'].sum().reset_index()
-                
-                # Create heatmap
-                heatmap_data = day_hour_data.pivot(index='day_of_week', columns='hour', values='amount')
-                
-                fig_heatmap = px.imshow(
-                    heatmap_data,
-                    title="Spending Heatmap (Day vs Hour)",
-                    color_continuous_scale="viridis"
-                )
-                st.plotly_chart(fig_heatmap, use_container_width=True)
+                # Spending heatmap by day of week; hours are finer than the daily cube, so this groups rows
+                def build_heatmap():
+                    day_hour = get_derived_columns(df, dataset_fingerprint, ['day_of_week', 'hour']).loc[filtered_df.index]
+                    day_hour_data = filtered_df['amount'].groupby(
+                        [day_hour['day_of_week'], day_hour['hour']], observed=True
+                    ).sum().reset_index()
+                    heatmap_data = day_hour_data.pivot(index='day_of_week', columns='hour', values='amount')
+                    return px.imshow(
+                        heatmap_data,
+                        title="Spending Heatmap (Day vs Hour)",
+                        color_continuous_scale="viridis"
+                    )
+                st.plotly_chart(cached_figure('heatmap', build_heatmap), use_container_width=True)
             
             with col2:
                 # Top transactions
@@ -396,6 +500,17 @@ if df is not None and not df.empty:
                     top_cols.insert(1, 'description')
                 top_transactions = filtered_df.nlargest(10, 'amount')[top_cols]
                 st.dataframe(top_transactions, use_container_width=True)
+            
+            # Transactions unusual for their own merchant or category
+            st.markdown("### 🚨 Unusual Transactions")
+            # Scoring the whole dataset is the slowest step, so it waits for AI analysis or an explicit request
+            if 'anomalies' in get_dataset_analysis(df, dataset_fingerprint) or st.button("🔎 Find Unusual Transactions"):
+                fig_anomalies = cached_figure(
+                    'anomalies',
+                    lambda: FinanceVisualizations().create_anomaly_detection(filtered_df, get_dataset_anomalies(df, dataset_fingerprint)),
+                    threshold=Config.ANOMALY_THRESHOLD
+                )
+                st.plotly_chart(fig_anomalies, use_container_width=True)
         
         with tab4:
             # Detailed transaction table with enhanced features
@@ -463,6 +578,16 @@ if df is not None and not df.empty:
     
     else:
         st.warning("⚠️ No transactions found with the current filters. Try adjusting your filter criteria.")
+    
+    if env_config['debug']:
+        # Rendered last so the counters include this run's charts
+        with st.sidebar.expander("🖼️ Figure Cache"):
+            figure_stats = figure_cache.stats()
+            st.caption(
+                f"{figure_stats['size']:,}/{figure_stats['max_size']:,} charts, ttl {figure_stats['ttl']:,}s, "
+                f"{figure_stats['hit_rate']:.0%} hit rate ({figure_stats['hits']:,} hits, {figure_stats['misses']:,} misses, "
+                f"{figure_stats['expired']:,} expired)"
+            )
 
 else:
     # Welcome screen
@@ -477,7 +602,7 @@ else:
     - 📈 **Trend Analysis**: Understand your spending patterns over time
     
     ### How to get started:
-    1. Upload your ledger data (HTML or CSV), which you can download from: https://takeout.google.com/
+    1. Upload your ledger data (HTML, CSV or JSON), which you can download from: https://takeout.google.com/
     2. Use the filters in the sidebar to analyze specific data
     3. Click "Run AI Analysis" for intelligent insights
     4. Explore different chart types in the Analytics section
@@ -486,6 +611,7 @@ else:
     ### Supported file formats:
     - Ledger Activity HTML files
     - CSV exports
+    - JSON and NDJSON exports
     """)
     
     # Sample data option
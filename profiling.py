@@ -0,0 +1,66 @@
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from config import Config
+
+
+def get_logger(name):
+    """Logger whose level follows the LOG_LEVEL environment setting"""
+    logger = logging.getLogger(name)
+    logger.setLevel(Config.get_environment_config()['log_level'].upper())
+    return logger
+
+
+class StageProfiler:
+    """Per-stage wall time, CPU time, row counts and peak traced memory"""
+
+    def __init__(self, trace_memory=None):
+        if trace_memory is None:
+            trace_memory = Config.PROFILE_MEMORY or Config.get_environment_config()['debug']
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the enclosed block; set record['rows_out'] inside it"""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None,
+                  'wall_seconds': None, 'cpu_seconds': None, 'peak_bytes': None}
+
+        # tracemalloc slows allocation-heavy code several times over, so it is opt-in
+        started_tracing = False
+        if self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu, 4)
+            if self.trace_memory:
+                record['peak_bytes'] = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+
+    def records(self):
+        """Stage records in execution order"""
+        return list(self.stages)
+
+    def log(self, logger, label):
+        """Write one line per stage at INFO and the slowest stage at DEBUG"""
+        for record in self.stages:
+            peak = '' if record['peak_bytes'] is None else f", peak {record['peak_bytes'] / 1024 / 1024:.1f} MB"
+            logger.info(
+                "%s %s: %.3fs wall, %.3fs cpu, rows %s -> %s%s", label, record['stage'],
+                record['wall_seconds'], record['cpu_seconds'], record['rows_in'], record['rows_out'], peak
+            )
+        if self.stages:
+            slowest = max(self.stages, key=lambda record: record['wall_seconds'])
+            logger.debug("%s slowest stage: %s", label, slowest['stage'])
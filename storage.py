@@ -0,0 +1,393 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config import Config
+from aggregates import daily_partials, merge_partials
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:
+    pyarrow = None
+
+# Result frames persisted per cache entry; near_duplicates only exists for merged uploads
+RESULT_FRAMES = ('data', 'duplicates', 'near_duplicates')
+
+
+def _column_dtypes(df):
+    """Object, string and categorical dtypes, which Parquet doesn't always round-trip"""
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if dtype == object:
+            dtypes[col] = 'object'
+        elif isinstance(dtype, pd.StringDtype):
+            dtypes[col] = f"string[{dtype.storage}]" if dtype.na_value is pd.NA else 'str'
+        elif isinstance(dtype, pd.CategoricalDtype):
+            # Empty frames lose their categories and ordering
+            dtypes[col] = {'categories': dtype.categories.tolist(), 'ordered': bool(dtype.ordered)}
+    return dtypes
+
+
+def _restore_dtypes(df, dtypes):
+    return df.astype({
+        col: pd.CategoricalDtype(**dtype) if isinstance(dtype, dict) else dtype
+        for col, dtype in dtypes.items()
+    })
+
+
+class ParsedFrameCache:
+    """Content-addressed on-disk cache of processed uploads stored as Parquet"""
+
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None):
+        env = Config.get_environment_config()
+        self.cache_dir = cache_dir or env['cache_dir']
+        self.ttl = env['cache_ttl'] if ttl is None else ttl
+        self.max_bytes = max_bytes or env['cache_max_bytes']
+        self.enabled = pyarrow is not None
+
+    def key_for(self, files, version, options=None):
+        """Hash (name, bytes) pairs together with the parser version and output-changing options"""
+        digest = hashlib.sha256(str(version).encode())
+        digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode())
+        for name, content in files:
+            digest.update(name.encode())
+            digest.update(hashlib.sha256(content).digest())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Return the cached result for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        entry = self._entry_dir(key)
+        meta_path = os.path.join(entry, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        if self.ttl and time.time() - os.path.getmtime(meta_path) > self.ttl:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            result = {
+                name: pd.read_parquet(os.path.join(entry, f"{name}.parquet"))
+                for name in meta.get('frames', RESULT_FRAMES[:2])
+            }
+            # Parquet reads text back as the default str dtype; restore the processed dtypes
+            for name, dtypes in meta.get('dtypes', {}).items():
+                result[name] = _restore_dtypes(result[name], dtypes)
+            result['issues'] = meta['issues']
+            result['summary'] = meta['summary']
+        except (OSError, ValueError, KeyError):
+            # Corrupt or half-evicted entry
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(os.path.join(entry, 'data.parquet'))
+        return result
+
+    def put(self, key, result):
+        """Store a process_file style result under key"""
+        if not self.enabled:
+            return
+        entry = self._entry_dir(key)
+        staging = f"{entry}.tmp-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        try:
+            frames = [name for name in RESULT_FRAMES if name in result]
+            dtypes = {}
+            for name in frames:
+                result[name].to_parquet(os.path.join(staging, f"{name}.parquet"), index=False)
+                dtypes[name] = _column_dtypes(result[name])
+            meta = {'frames': frames, 'dtypes': dtypes, 'issues': result['issues'], 'summary': result['summary']}
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, default=str)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self._entry_dir(key)
+            data_path = os.path.join(entry, 'data.parquet')
+            if not os.path.exists(data_path):
+                continue
+            if self.ttl and time.time() - os.path.getmtime(os.path.join(entry, 'meta.json')) > self.ttl:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((os.path.getmtime(data_path), size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+class HashIndex:
+    """Persistent sorted set of uint64 transaction hashes"""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            self.hashes = np.load(path)
+        else:
+            self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, hashes):
+        """Boolean mask of which hashes are already in the index"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add(self, hashes):
+        """Insert hashes and persist the index"""
+        self.hashes = np.union1d(self.hashes, np.asarray(hashes, dtype=np.uint64))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        staging = f"{self.path}.tmp"
+        with open(staging, 'wb') as f:
+            np.save(f, self.hashes)
+        os.replace(staging, self.path)
+
+
+class LedgerStore:
+    """Persisted ledger stored as Parquet parts, daily partial aggregates and a watermark of its newest transactions"""
+
+    def __init__(self, ledger_dir):
+        self.ledger_dir = ledger_dir
+        self.watermark_path = os.path.join(ledger_dir, 'watermark.json')
+        self.partials_path = os.path.join(ledger_dir, 'partials.parquet')
+        self.hash_index = HashIndex(os.path.join(ledger_dir, 'hashes.npy'))
+
+    def _parts(self):
+        if not os.path.isdir(self.ledger_dir):
+            return []
+        return sorted(
+            os.path.join(self.ledger_dir, name)
+            for name in os.listdir(self.ledger_dir)
+            if name.startswith('part-') and name.endswith('.parquet')
+        )
+
+    def load(self):
+        """Return the full ledger, or None if nothing has been stored yet"""
+        parts = self._parts()
+        if not parts:
+            return None
+        return pd.concat([pd.read_parquet(path) for path in parts], ignore_index=True)
+
+    def partials(self):
+        """Daily partial aggregates of everything stored, or None"""
+        if not os.path.exists(self.partials_path):
+            return None
+        return pd.read_parquet(self.partials_path)
+
+    def watermark(self):
+        """Return {'date', 'keys'} (transaction hashes) for the newest stored transactions, or None"""
+        if not os.path.exists(self.watermark_path):
+            return None
+        with open(self.watermark_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        return {'date': pd.Timestamp(stored['date']), 'keys': set(stored['keys'])}
+
+    def append(self, tail, watermark):
+        """Write tail as a new part, then advance the watermark"""
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        part_path = os.path.join(self.ledger_dir, f"part-{len(self._parts()):05d}.parquet")
+        tail.to_parquet(part_path, index=False)
+        self.hash_index.add(tail['transaction_hash'])
+
+        # Fold the new rows into the stored partials instead of re-aggregating the ledger
+        partials = merge_partials(self.partials(), daily_partials(tail))
+        staging = f"{self.partials_path}.tmp"
+        partials.to_parquet(staging)
+        os.replace(staging, self.partials_path)
+
+        staging = f"{self.watermark_path}.tmp"
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump({'date': watermark['date'].isoformat(), 'keys': sorted(watermark['keys'])}, f)
+        os.replace(staging, self.watermark_path)
+
+
+class MerchantCategoryCache:
+    """Thread-safe bounded LRU of merchant key -> category, optionally persisted as JSON"""
+
+    def __init__(self, path=None, max_size=None, version=None):
+        self.path = path
+        self.max_size = max_size or Config.MERCHANT_CACHE_SIZE
+        self.version = version
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Entries categorized under different keywords are stale
+        if stored.get('version') != self.version:
+            return
+        self.entries = OrderedDict(stored['entries'][-self.max_size:])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_many(self, keys):
+        """Cached category per key (None on a miss), marking hits as recently used"""
+        with self._lock:
+            found = []
+            for key in keys:
+                category = self.entries.get(key)
+                if category is None:
+                    self.misses += 1
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                found.append(category)
+            return found
+
+    def put_many(self, items):
+        """Insert (key, category) pairs, evicting the least recently used beyond max_size"""
+        with self._lock:
+            for key, category in items:
+                self.entries[key] = category
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self._dirty = True
+
+    def stats(self):
+        """Lookup counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self.entries),
+                'max_size': self.max_size
+            }
+
+    def save(self):
+        """Persist entries in LRU order if anything changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            stored = {'version': self.version, 'entries': list(self.entries.items())}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        staging = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(staging, self.path)
+
+
+class FigureCache:
+    """Thread-safe LRU of rendered figures that expire after a time-to-live"""
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or Config.FIGURE_CACHE_SIZE
+        self.ttl = Config.get_environment_config()['cache_ttl'] if ttl is None else ttl
+        # key -> (stored_at, figure); st.plotly_chart re-validates dicts and takes no JSON, so
+        # the Figure itself is the cheapest form to hand back (~3 ms to send vs ~20 ms from a dict)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(fingerprint, filters, chart, params=None):
+        """Stable key; lists and sets are multiselect choices and compare in any order, tuples keep theirs"""
+        def normalize(value):
+            if isinstance(value, dict):
+                return {str(name): normalize(item) for name, item in value.items()}
+            if isinstance(value, tuple):
+                return [normalize(item) for item in value]
+            if isinstance(value, (list, set, frozenset, np.ndarray, pd.Index)):
+                return sorted((normalize(item) for item in value), key=str)
+            if isinstance(value, np.generic):
+                return value.item()
+            return value
+        return json.dumps(
+            [fingerprint, normalize(filters or {}), chart, normalize(params or {})], sort_keys=True, default=str
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Cached figure or None, dropping it once older than the TTL"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self.entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, figure):
+        """Store a figure, evicting the least recently used beyond max_size"""
+        with self._lock:
+            self.entries[key] = (time.time(), figure)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_or_create(self, key, build):
+        """Cached figure for key, calling build() only on a miss"""
+        figure = self.get(key)
+        if figure is None:
+            # Built outside the lock so a slow chart doesn't block other sessions
+            figure = build()
+            self.put(key, figure)
+        return figure
+
+    def stats(self):
+        """Lookup counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl
+            }
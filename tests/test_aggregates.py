@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from aggregates import TransactionAggregate, daily_partials, filter_partials, merge_partials
+from ai_agent import FinanceAIAgent
+from benchmark import make_transactions
+from data_processor import amount_paise
+
+
+@pytest.fixture
+def transactions():
+    df = make_transactions(3000, seed=11)
+    df['category'] = np.random.default_rng(11).choice(['Food', 'Transport', 'Bills'], len(df))
+    return df
+
+
+def row_insights(df):
+    """Insights computed directly from rows, in paise"""
+    paise = amount_paise(df).astype('int64')
+    debits = df['type'] == 'Debit'
+    monthly = paise[debits].groupby(df.loc[debits, 'date'].dt.to_period('M')).sum()
+    return {
+        'total_transactions': len(df),
+        'total_spent': paise[debits].sum(),
+        'total_received': paise[df['type'] == 'Credit'].sum(),
+        'top_categories': paise[debits].groupby(df.loc[debits, 'category']).sum().nlargest(5).to_dict(),
+        'monthly': monthly,
+    }
+
+
+def assert_matches_rows(aggregate, df):
+    expected = row_insights(df)
+    assert aggregate.count() == expected['total_transactions']
+    assert aggregate.total('Debit') == expected['total_spent']
+    assert aggregate.total('Credit') == expected['total_received']
+    assert aggregate.breakdown('category').head(5).to_dict() == expected['top_categories']
+    assert aggregate.monthly().to_dict() == expected['monthly'].to_dict()
+
+
+def test_merged_partials_match_whole_frame(transactions, tmp_path):
+    # Split by position, as separate uploads or ledger appends would be
+    parts = [transactions.iloc[start::3] for start in range(3)]
+    merged = TransactionAggregate(partials=merge_partials(*(daily_partials(part) for part in parts)))
+    assert_matches_rows(merged, transactions)
+    assert merged.std() == pytest.approx(amount_paise(transactions).astype('int64').std(ddof=0))
+
+    agent = FinanceAIAgent(str(tmp_path / 'merchants.json'))
+    assert agent.analyze_spending_patterns(transactions, merged) == agent.analyze_spending_patterns(transactions)
+
+
+@pytest.mark.parametrize('start, end, types', [
+    ('2020-03-01', '2021-06-30', None),
+    (None, '2019-12-31', ['Debit']),
+    ('2023-01-15', None, ['Credit']),
+])
+def test_filtered_partials_match_filtered_rows(transactions, start, end, types):
+    partials = filter_partials(daily_partials(transactions), start=start, end=end, types=types)
+
+    # Partials are per day, so bounds apply to the calendar day of each row
+    days = transactions['date'].dt.normalize()
+    rows = pd.Series(True, index=transactions.index)
+    if start is not None:
+        rows &= days >= pd.Timestamp(start)
+    if end is not None:
+        rows &= days <= pd.Timestamp(end)
+    if types is not None:
+        rows &= transactions['type'].isin(types)
+    assert_matches_rows(TransactionAggregate(partials=partials), transactions[rows])
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from anomalies import AnomalyDetector
+from benchmark import make_transactions
+
+
+@pytest.fixture
+def transactions():
+    # Day-only dates, as in most CSV exports, so many rows share a timestamp
+    df = make_transactions(4000, seed=5)
+    df['date'] = df['date'].dt.normalize()
+    df['category'] = np.random.default_rng(5).choice(['Food', 'Transport', 'Bills'], len(df))
+    # A few spikes well above each merchant's usual amounts
+    df.loc[df.index[::400], 'amount'] *= 40
+    return df.sort_values('date', kind='stable')
+
+
+def test_incremental_updates_match_full_score(transactions):
+    expected = AnomalyDetector(window=20, min_history=5).score(transactions)
+    assert expected['is_anomaly'].any()
+
+    cutoff = transactions['date'].iloc[len(transactions) * 2 // 3]
+    detector = AnomalyDetector(window=20, min_history=5)
+    first = detector.update(transactions[transactions['date'] < cutoff])
+    second = detector.update(transactions[transactions['date'] >= cutoff])
+    pd.testing.assert_frame_equal(pd.concat([first, second]), expected)
+
+
+def test_scores_do_not_depend_on_input_order(transactions):
+    expected = AnomalyDetector(window=20, min_history=5).score(transactions)
+    shuffled = AnomalyDetector(window=20, min_history=5).score(transactions.sample(frac=1, random_state=9))
+    pd.testing.assert_frame_equal(shuffled.loc[expected.index], expected)
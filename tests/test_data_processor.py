@@ -0,0 +1,113 @@
+import io
+import json
+import pytest
+import pandas as pd
+from benchmark import make_activity_html, make_transactions
+from data_processor import DataProcessor, frame_fingerprint
+
+
+@pytest.mark.parametrize('chunk_size', [4096, 97, 7])
+def test_html_stream_matches_tree_parser_across_chunk_boundaries(chunk_size):
+    html = make_activity_html(500)
+    processor = DataProcessor()
+    expected = processor.parse_html_file(html)
+    assert len(expected) == 500
+    assert processor.parse_html_stream(html, chunk_size=chunk_size).equals(expected)
+    assert processor.parse_html_stream(html.decode('utf-8'), chunk_size=chunk_size).equals(expected)
+
+
+MIXED_DATE_CSV = """Date,Description,Amount,Type,category
+2024-03-05 10:15,Paid to Swiggy,250.00,Debit,Food
+2024-03-06,Paid to Uber,180.50,Debit,Transport
+03/07/2024,Received from Ravi,1000,Credit,Transfer
+2024-03-08T09:00:00Z,Paid to Amazon,1499,Debit,Shopping
+03/09/2024,Paid to Zomato,320,Debit,Food
+2024-03-10 08:00,Paid to Airtel,599,Debit,Bills
+2024-03-11,Paid to Swiggy,210,Debit,Food
+03/12/2024,Paid to Uber,95,Debit,Transport
+2024-03-13T19:45:00.123+05:30,Paid to Netflix,649,Debit,Entertainment
+Mar 14 2024,Paid to BigBasket,870,Debit,Groceries
+"""
+
+
+@pytest.mark.parametrize('chunksize', [5, 3, 1])
+def test_chunked_csv_matches_whole_file(chunksize):
+    expected = DataProcessor(csv_chunksize=None).parse_csv_file(io.StringIO(MIXED_DATE_CSV))
+    assert len(expected) == 10
+    assert expected['date'].notna().all()
+    assert 'category' in expected.columns
+    chunked = DataProcessor(csv_chunksize=chunksize).parse_csv_file(io.StringIO(MIXED_DATE_CSV))
+    pd.testing.assert_frame_equal(chunked, expected)
+
+
+def _takeout_records(rows):
+    """Takeout-style records whose times mix fractional and whole seconds"""
+    return [
+        {
+            'header': 'Google Pay',
+            'title': f'Paid ₹{index * 7919 % 100000:,}.50 to Merchant {index % 13}',
+            'time': f'2024-03-{index % 28 + 1:02d}T10:{index % 60:02d}:00{".123" if index % 2 else ""}Z',
+            'products': ['Google Pay'],
+        }
+        for index in range(rows)
+    ]
+
+
+@pytest.mark.parametrize('chunk_size', [4096, 97, 7])
+@pytest.mark.parametrize('layout', ['array', 'ndjson'])
+def test_json_stream_matches_whole_file_across_chunk_boundaries(layout, chunk_size):
+    records = _takeout_records(200)
+    if layout == 'array':
+        text = json.dumps(records, indent=2, ensure_ascii=False)
+    else:
+        text = '\n'.join(json.dumps(record, ensure_ascii=False) for record in records) + '\n'
+    processor = DataProcessor()
+    expected = processor.parse_json_file(text, chunk_size=len(text) + 1)
+    assert len(expected) == 200
+    assert expected['date'].notna().all()
+    pd.testing.assert_frame_equal(processor.parse_json_file(text, chunk_size=chunk_size), expected)
+    pd.testing.assert_frame_equal(processor.parse_json_file(text.encode('utf-8'), chunk_size=chunk_size), expected)
+
+
+def test_near_duplicates_pair_sources_within_window_only():
+    df = pd.DataFrame({
+        'date': pd.to_datetime([
+            '2024-03-05 10:00', '2024-03-05 18:00', '2024-03-09 10:00',
+            '2024-03-12 10:00', '2024-03-12 11:00', '2024-03-05 10:30',
+        ]),
+        'amount': [250.0, 250.0, 250.0, 499.0, 499.0, 80.0],
+        'description': [
+            'UPI/Swiggy Bangalore/ref 4411', 'Paid to Swiggy', 'Paid to Swiggy',
+            'Paid to Uber', 'Paid to Uber', 'Paid to Chai Point',
+        ],
+        'type': 'Debit',
+        'source_file': ['bank.csv', 'activity.html', 'activity.html', 'bank.csv', 'bank.csv', 'bank.csv'],
+    })
+    processor = DataProcessor()
+    near = processor.detect_near_duplicates(df)
+    # Only the cross-source pair 8 hours apart; the same payment 4 days later and
+    # the pair repeated inside one export are not near duplicates
+    assert sorted(near.index) == [0, 1]
+    assert near['cluster'].nunique() == 1
+    assert 0 < near['confidence'].iloc[0] <= 1
+    
+    shuffled = processor.detect_near_duplicates(df.sample(frac=1, random_state=3))
+    assert sorted(shuffled.index) == [0, 1]
+    
+    # Without a source column the repeated payment does pair up
+    assert sorted(processor.detect_near_duplicates(df.drop(columns='source_file')).index) == [0, 1, 3, 4]
+
+
+def test_frame_fingerprint_covers_type_category_and_labels():
+    df = make_transactions(300)
+    df['category'] = 'Food'
+    fingerprint = frame_fingerprint(df)
+    assert frame_fingerprint(df.sample(frac=1, random_state=7)) == fingerprint
+    
+    flipped = df.copy()
+    flipped['type'] = flipped['type'].map({'Debit': 'Credit', 'Credit': 'Debit'})
+    recategorized = df.copy()
+    recategorized.loc[recategorized.index[5], 'category'] = 'Bills'
+    relabeled = df.set_axis(df.index + 1)
+    for changed in (flipped, recategorized, relabeled):
+        assert frame_fingerprint(changed) != fingerprint
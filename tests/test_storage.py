@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+from benchmark import make_activity_html, make_transactions
+from data_processor import DataProcessor
+from storage import ParsedFrameCache, pyarrow
+
+
+@pytest.mark.skipif(pyarrow is None, reason="Parquet cache needs pyarrow")
+@pytest.mark.parametrize('options', [{}, {'compact': False}, {'arrow_strings': True}, {'lazy': False}])
+def test_cache_hit_matches_fresh_result_per_processor_options(tmp_path, options):
+    cache = ParsedFrameCache(str(tmp_path))
+    files = [
+        ('activity.html', make_activity_html(200), 'html'),
+        ('bank.csv', make_transactions(200).to_csv(index=False).encode(), 'csv')
+    ]
+    # A differently configured processor fills the cache first; its entry must not be reused
+    DataProcessor(compact=not options.get('compact', True)).process_files(files, cache=cache)
+
+    processor = DataProcessor(**options)
+    expected = processor.process_files(files)
+    processor.process_files(files, cache=cache)
+    cached = processor.process_files(files, cache=cache)
+    assert cached['summary']['cache_hit']
+    for name in ['data', 'duplicates', 'near_duplicates']:
+        pd.testing.assert_frame_equal(cached[name], expected[name])
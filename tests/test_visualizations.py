@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from visualizations import downsample_points, lttb_indices
+
+
+@pytest.mark.parametrize('n, threshold', [(1000, 3), (1000, 50), (1001, 1000), (5000, 777)])
+def test_lttb_keeps_endpoints_and_exactly_threshold_points(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = rng.normal(size=n).cumsum()
+    indices = lttb_indices(x, y, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_returns_everything_at_or_below_threshold():
+    x = np.arange(10, dtype='float64')
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 2).tolist() == list(range(10))
+
+
+def test_lttb_keeps_isolated_spike():
+    x = np.arange(10000, dtype='float64')
+    y = np.zeros(10000)
+    y[4321] = 50
+    assert 4321 in lttb_indices(x, y, 100)
+
+
+def test_downsample_points_returns_x_order_within_budget():
+    dates = pd.Series(pd.date_range('2024-01-01', periods=5000, freq='h')).sample(frac=1, random_state=4)
+    amounts = np.random.default_rng(4).uniform(10, 500, len(dates))
+    points = downsample_points(dates, amounts, budget=400)
+    assert len(points) == 400
+    assert dates.iloc[points].is_monotonic_increasing
+    assert dates.iloc[points[[0, -1]]].tolist() == [dates.min(), dates.max()]
+
+    small = downsample_points(dates.iloc[:300], amounts[:300], budget=400)
+    assert sorted(small.tolist()) == list(range(300))
+    assert dates.iloc[small].is_monotonic_increasing
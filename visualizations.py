@@ -5,6 +5,76 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import calendar
+from config import Config
+from data_processor import ensure_columns
+from aggregates import TransactionAggregate
+from anomalies import AnomalyDetector
+
+
+def _numeric_axis(x):
+    """Float x positions for LTTB: timestamps as nanoseconds, labels by position"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype('int64').astype('float64')
+    if np.issubdtype(x.dtype, np.number):
+        return x.astype('float64')
+    return np.arange(len(x), dtype='float64')
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that preserve the shape of x-sorted (x, y)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # First and last points are fixed; the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        following_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        mean_x, mean_y = x[end:following_end].mean(), y[end:following_end].mean()
+        area = np.abs(
+            (x[previous] - mean_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_points(x, y, budget=None):
+    """Indices, in x order, of at most budget points"""
+    budget = budget or Config.CHART_POINT_BUDGET
+    n = len(x)
+    order = np.argsort(_numeric_axis(x), kind='stable')
+    if n <= budget:
+        return order
+    values = np.asarray(y, dtype='float64')[order]
+    finite = np.isfinite(values)
+    positions = np.flatnonzero(finite)
+    sampled = positions[lttb_indices(_numeric_axis(x)[order][finite], values[finite], budget)]
+    return order[sampled]
+
+
+def scatter_trace(points, budget=None):
+    """Scattergl above the point budget, where SVG markers stall the browser"""
+    return go.Scattergl if points > (budget or Config.CHART_POINT_BUDGET) else go.Scatter
+
+
+def note_downsampling(fig, shown, total):
+    """Record the applied reduction in layout.meta and as a caption on the figure"""
+    if shown >= total:
+        return fig
+    fig.update_layout(meta={'downsampling': {'method': 'lttb', 'points': int(total), 'shown': int(shown)}})
+    fig.add_annotation(
+        text=f"Showing {shown:,} of {total:,} points (LTTB downsampled)",
+        xref='paper', yref='paper', x=1, y=1.02, xanchor='right', yanchor='bottom',
+        showarrow=False, font=dict(size=10, color='gray')
+    )
+    return fig
 
 class FinanceVisualizations:
     def __init__(self):
@@ -17,53 +87,63 @@ class FinanceVisualizations:
             'info': '#17a2b8'
         }
     
-    def create_dashboard_metrics(self, df):
+    def create_dashboard_metrics(self, df, aggregate=None):
         """Create key performance indicators"""
         metrics = {}
         
-        # Basic metrics
-        metrics['total_transactions'] = len(df)
-        metrics['total_spent'] = df[df['type'] == 'Debit']['amount'].sum()
-        metrics['total_received'] = df[df['type'] == 'Credit']['amount'].sum()
+        # Basic metrics from the shared (type, category, month) aggregate, in exact integer paise
+        aggregate = aggregate or TransactionAggregate(df)
+        metrics['total_transactions'] = aggregate.count()
+        metrics['total_spent'] = aggregate.total('Debit') / 100
+        metrics['total_received'] = aggregate.total('Credit') / 100
         metrics['net_flow'] = metrics['total_received'] - metrics['total_spent']
-        metrics['avg_transaction'] = df['amount'].mean()
-        metrics['largest_transaction'] = df['amount'].max()
-        metrics['smallest_transaction'] = df['amount'].min()
+        metrics['avg_transaction'] = aggregate.total() / max(aggregate.count(), 1) / 100
+        metrics['largest_transaction'] = aggregate.largest() / 100
+        metrics['smallest_transaction'] = aggregate.smallest() / 100
         
         # Time-based metrics
-        if 'month' in df.columns:
-            monthly_spending = df[df['type'] == 'Debit'].groupby('month')['amount'].sum()
+        monthly_spending = aggregate.monthly() / 100
+        if not monthly_spending.empty:
             metrics['avg_monthly_spending'] = monthly_spending.mean()
             metrics['highest_month'] = monthly_spending.idxmax()
             metrics['lowest_month'] = monthly_spending.idxmin()
         
         # Frequency metrics
-        daily_transactions = df.groupby(df['date'].dt.date).size()
-        metrics['avg_daily_transactions'] = daily_transactions.mean()
-        metrics['most_active_day'] = daily_transactions.idxmax()
+        daily_transactions = aggregate.partials['count'].groupby(level='day').sum()
+        if not daily_transactions.empty:
+            metrics['avg_daily_transactions'] = daily_transactions.mean()
+            metrics['most_active_day'] = daily_transactions.idxmax().date()
         
         return metrics
     
-    def create_timeline_chart(self, df, chart_type='daily'):
+    def create_timeline_chart(self, df, chart_type='daily', cube=None):
         """Create timeline visualization"""
+        # Daily, weekly and monthly series all roll up from the shared (type, category, day) cube
+        cube = cube or TransactionAggregate(df)
         if chart_type == 'daily':
-            data = df.groupby('date')['amount'].sum().reset_index()
+            data = cube.timeline('D').rename('amount').rename_axis('date').reset_index()
             title = "Daily Transaction Timeline"
         elif chart_type == 'monthly':
-            data = df.groupby(df['date'].dt.to_period('M'))['amount'].sum().reset_index()
+            data = cube.timeline('M').rename('amount').rename_axis('date').reset_index()
             data['date'] = data['date'].astype(str)
             title = "Monthly Transaction Timeline"
         elif chart_type == 'weekly':
-            data = df.groupby(df['date'].dt.to_period('W'))['amount'].sum().reset_index()
+            data = cube.timeline('W').rename('amount').rename_axis('date').reset_index()
             data['date'] = data['date'].astype(str)
             title = "Weekly Transaction Timeline"
         
         fig = go.Figure()
         
+        # Trend is fitted on every point, then both lines are drawn at the downsampled points
+        z = np.polyfit(range(len(data)), data['amount'], 1)
+        p = np.poly1d(z)
+        points = downsample_points(data['date'], data['amount'])
+        trace = scatter_trace(len(data))
+        
         # Add main line
-        fig.add_trace(go.Scatter(
-            x=data['date'],
-            y=data['amount'],
+        fig.add_trace(trace(
+            x=data['date'].iloc[points],
+            y=data['amount'].iloc[points],
             mode='lines+markers',
             name='Transaction Amount',
             line=dict(color=self.color_scheme['primary'], width=3),
@@ -71,11 +151,9 @@ class FinanceVisualizations:
         ))
         
         # Add trend line
-        z = np.polyfit(range(len(data)), data['amount'], 1)
-        p = np.poly1d(z)
-        fig.add_trace(go.Scatter(
-            x=data['date'],
-            y=p(range(len(data))),
+        fig.add_trace(trace(
+            x=data['date'].iloc[points],
+            y=p(points),
             mode='lines',
             name='Trend',
             line=dict(color=self.color_scheme['secondary'], width=2, dash='dash')
@@ -90,10 +168,12 @@ class FinanceVisualizations:
             template='plotly_white'
         )
         
-        return fig
+        return note_downsampling(fig, len(points), len(data))
     
     def create_spending_heatmap(self, df):
         """Create spending heatmap by day of week and hour"""
+        # Hours are finer than the daily cube, so this one chart still groups rows
+        ensure_columns(df, ['day_of_week', 'hour'])
         if 'day_of_week' not in df.columns or 'hour' not in df.columns:
             return None
         
@@ -119,12 +199,13 @@ class FinanceVisualizations:
         
         return fig
     
-    def create_category_breakdown(self, df, chart_type='pie'):
+    def create_category_breakdown(self, df, chart_type='pie', cube=None):
         """Create category breakdown visualization"""
-        if 'category' not in df.columns:
+        cube = cube or TransactionAggregate(df)
+        if 'category' not in cube.levels:
             return None
         
-        category_data = df.groupby('category')['amount'].sum().sort_values(ascending=False)
+        category_data = cube.totals('category')
         
         if chart_type == 'pie':
             fig = px.pie(
@@ -185,17 +266,18 @@ class FinanceVisualizations:
         
         return fig
     
-    def create_comparison_chart(self, df, compare_by='type'):
+    def create_comparison_chart(self, df, compare_by='type', cube=None):
         """Create comparison chart between different categories"""
+        cube = cube or TransactionAggregate(df)
         if compare_by == 'type':
-            data = df.groupby('type')['amount'].sum().reset_index()
+            data = cube.totals('type').rename('amount').rename_axis('type').reset_index()
             title = "Credit vs Debit Comparison"
         elif compare_by == 'month':
-            data = df.groupby('month')['amount'].sum().reset_index()
+            data = cube.month_of_year().rename('amount').rename_axis('month').reset_index()
             data['month_name'] = data['month'].apply(lambda x: calendar.month_name[x])
             title = "Monthly Spending Comparison"
         elif compare_by == 'day_of_week':
-            data = df.groupby('day_of_week')['amount'].sum().reset_index()
+            data = cube.day_of_week().rename('amount').rename_axis('day_of_week').reset_index()
             title = "Spending by Day of Week"
         
         fig = px.bar(
@@ -215,29 +297,30 @@ class FinanceVisualizations:
         
         return fig
     
-    def create_rolling_averages(self, df, window=7):
+    def create_rolling_averages(self, df, window=7, cube=None):
         """Create rolling average chart"""
-        if 'rolling_7d_avg' not in df.columns:
-            return None
-        
-        daily_data = df.groupby('date')['amount'].sum().reset_index()
+        cube = cube or TransactionAggregate(df)
+        daily_data = cube.timeline('D').rename('amount').rename_axis('date').reset_index()
         daily_data['rolling_avg'] = daily_data['amount'].rolling(window=window).mean()
         
         fig = go.Figure()
+        trace = scatter_trace(len(daily_data))
         
         # Actual values
-        fig.add_trace(go.Scatter(
-            x=daily_data['date'],
-            y=daily_data['amount'],
+        points = downsample_points(daily_data['date'], daily_data['amount'])
+        fig.add_trace(trace(
+            x=daily_data['date'].iloc[points],
+            y=daily_data['amount'].iloc[points],
             mode='markers',
             name='Daily Amount',
             marker=dict(size=4, color=self.color_scheme['primary'])
         ))
         
         # Rolling average
-        fig.add_trace(go.Scatter(
-            x=daily_data['date'],
-            y=daily_data['rolling_avg'],
+        line_points = downsample_points(daily_data['date'], daily_data['rolling_avg'])
+        fig.add_trace(trace(
+            x=daily_data['date'].iloc[line_points],
+            y=daily_data['rolling_avg'].iloc[line_points],
             mode='lines',
             name=f'{window}-Day Rolling Average',
             line=dict(color=self.color_scheme['secondary'], width=3)
@@ -250,22 +333,23 @@ class FinanceVisualizations:
             template='plotly_white'
         )
         
-        return fig
+        return note_downsampling(fig, len(points) + len(line_points), 2 * len(daily_data))
     
-    def create_anomaly_detection(self, df):
+    def create_anomaly_detection(self, df, scores=None):
         """Create anomaly detection visualization"""
-        # Calculate z-scores for amounts
-        amounts = df['amount']
-        z_scores = np.abs((amounts - amounts.mean()) / amounts.std())
-        anomalies = z_scores > 2  # Threshold for anomalies
+        # Robust per-merchant/category scores; pass precomputed AnomalyDetector scores to reuse them
+        if scores is None:
+            scores = AnomalyDetector().score(df)
+        anomalies = scores['is_anomaly'].reindex(df.index, fill_value=False).to_numpy()
         
         fig = go.Figure()
         
-        # Normal transactions
+        # Normal transactions are downsampled to the point budget; every anomaly is drawn
         normal_data = df[~anomalies]
-        fig.add_trace(go.Scatter(
-            x=normal_data['date'],
-            y=normal_data['amount'],
+        points = downsample_points(normal_data['date'], normal_data['amount'])
+        fig.add_trace(scatter_trace(len(normal_data))(
+            x=normal_data['date'].iloc[points],
+            y=normal_data['amount'].iloc[points],
             mode='markers',
             name='Normal Transactions',
             marker=dict(size=6, color=self.color_scheme['primary'])
@@ -274,12 +358,14 @@ class FinanceVisualizations:
         # Anomalous transactions
         anomaly_data = df[anomalies]
         if not anomaly_data.empty:
-            fig.add_trace(go.Scatter(
+            fig.add_trace(scatter_trace(len(anomaly_data))(
                 x=anomaly_data['date'],
                 y=anomaly_data['amount'],
                 mode='markers',
                 name='Anomalies',
-                marker=dict(size=10, color=self.color_scheme['danger'], symbol='diamond')
+                marker=dict(size=10, color=self.color_scheme['danger'], symbol='diamond'),
+                customdata=scores.loc[anomaly_data.index, 'anomaly_score'],
+                hovertemplate="%{x}<br>₹%{y:,.2f}<br>score %{customdata:.1f}<extra></extra>"
             ))
         
         fig.update_layout(
@@ -289,10 +375,11 @@ class FinanceVisualizations:
             template='plotly_white'
         )
         
-        return fig
+        return note_downsampling(fig, len(points) + len(anomaly_data), len(df))
     
-    def create_summary_dashboard(self, df):
+    def create_summary_dashboard(self, df, cube=None):
         """Create a comprehensive summary dashboard"""
+        cube = cube or TransactionAggregate(df)
         # Create subplots
         fig = make_subplots(
             rows=2, cols=2,
@@ -302,32 +389,35 @@ class FinanceVisualizations:
         )
         
         # Daily timeline
-        timeline_data = df.groupby('date')['amount'].sum().reset_index()
+        timeline_data = cube.timeline('D')
+        points = downsample_points(timeline_data.index, timeline_data.values)
         fig.add_trace(
-            go.Scatter(x=timeline_data['date'], y=timeline_data['amount'], mode='lines', name='Daily Amount'),
+            scatter_trace(len(timeline_data))(
+                x=timeline_data.index[points], y=timeline_data.values[points], mode='lines', name='Daily Amount'
+            ),
             row=1, col=1
         )
         
         # Category breakdown
-        if 'category' in df.columns:
-            category_data = df.groupby('category')['amount'].sum()
+        if 'category' in cube.levels:
+            category_data = cube.totals('category')
             fig.add_trace(
                 go.Pie(values=category_data.values, labels=category_data.index, name='Categories'),
                 row=1, col=2
             )
         
-        # Amount distribution
+        # Amount distribution (per transaction, so read from rows rather than the cube)
         fig.add_trace(
             go.Histogram(x=df['amount'], name='Amount Distribution'),
             row=2, col=1
         )
         
         # Monthly comparison
-        monthly_data = df.groupby('month')['amount'].sum().reset_index()
+        monthly_data = cube.month_of_year()
         fig.add_trace(
-            go.Bar(x=monthly_data['month'], y=monthly_data['amount'], name='Monthly Amount'),
+            go.Bar(x=monthly_data.index, y=monthly_data.values, name='Monthly Amount'),
             row=2, col=2
         )
         
         fig.update_layout(height=800, title_text="Financial Summary Dashboard")
-        return fig
+        return note_downsampling(fig, len(points), len(timeline_data))